@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import pool
@@ -35,13 +36,13 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", dsn)
 
 
+# секции истории аутентификаций создаются миграциями и командами
+# src/commands/auth_history_cli.py, в моделях их нет
+PARTITION_TABLE_PATTERN = re.compile(r"authentication_histories_\w+")
+
+
 def include_object(object_, name, type_, reflected, compare_to):
-    if type_ == "table" and name in {
-        "authentication_histories_000",
-        "authentication_histories_001",
-        "authentication_histories_002",
-        "authentication_histories_003",
-    }:
+    if type_ == "table" and PARTITION_TABLE_PATTERN.fullmatch(name):
         return False
     else:
         return True
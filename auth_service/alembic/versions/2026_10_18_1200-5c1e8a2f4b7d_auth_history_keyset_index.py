@@ -0,0 +1,34 @@
+"""auth-history-keyset-index
+
+Revision ID: 5c1e8a2f4b7d
+Revises: 2673d5d0dc6f
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8a2f4b7d'
+down_revision: Union[str, None] = '2673d5d0dc6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # индекс на секционированной таблице создается в каждой секции
+    op.create_index(
+        'ix_authentication_histories_user_id_created_at_id',
+        'authentication_histories',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_authentication_histories_user_id_created_at_id',
+        table_name='authentication_histories',
+    )
@@ -0,0 +1,129 @@
+"""auth-history-monthly-partitions
+
+Revision ID: 8d3f6b1a9e2c
+Revises: 5c1e8a2f4b7d
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6b1a9e2c'
+down_revision: Union[str, None] = '5c1e8a2f4b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HASH_MODULUS = 4
+MONTHS_AHEAD = 3
+COLUMNS = "id, success, user_agent, user_id, created_at, updated_at"
+
+
+def add_months(day: date, months: int) -> date:
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def create_history_table(name: str, unique_columns: list[str], partition_by: str):
+    op.create_table(name,
+                    sa.Column('id', sa.UUID(), nullable=False, comment='Идентификатор аутентификации'),
+                    sa.Column('success', sa.Boolean(), nullable=False,
+                              comment='Флаг, указывающий, был ли вход успешным (True) или нет (False)'),
+                    sa.Column('user_agent', sa.String(), nullable=True,
+                              comment='Информация о браузере и операционной системе пользователя'),
+                    sa.Column('user_id', sa.UUID(), nullable=False,
+                              comment='Идентификатор пользователя, связанного с этой записью о входе'),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable='created_at' not in unique_columns,
+                              comment='Дата создания записи'),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True,
+                              comment='Дата обновления записи'),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.UniqueConstraint(*unique_columns),
+
+                    comment='История аутентификации пользователей',
+                    postgresql_partition_by=partition_by
+                    )
+
+
+def rename_history_tables(old_prefix: str, new_prefix: str) -> None:
+    op.rename_table(old_prefix, new_prefix)
+    for remainder in range(HASH_MODULUS):
+        op.rename_table(f'{old_prefix}_{remainder:03d}', f'{new_prefix}_{remainder:03d}')
+
+
+def create_keyset_index() -> None:
+    op.create_index(
+        'ix_authentication_histories_user_id_created_at_id',
+        'authentication_histories',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def upgrade() -> None:
+    # Хеш-секции по user_id делятся на помесячные секции по created_at,
+    # чтобы старые данные удалялись отсоединением секции, а не DELETE.
+    # Новые месяцы создает команда maintain-partitions
+    op.drop_index(
+        'ix_authentication_histories_user_id_created_at_id',
+        table_name='authentication_histories',
+    )
+    rename_history_tables('authentication_histories', 'authentication_histories_old')
+
+    create_history_table(
+        'authentication_histories', ['id', 'user_id', 'created_at'], 'HASH (user_id)'
+    )
+
+    first_created_at = op.get_bind().scalar(
+        sa.text('SELECT min(created_at) FROM authentication_histories_old')
+    )
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    first_month = first_created_at.date().replace(day=1) if first_created_at else today
+    last_month = add_months(today, MONTHS_AHEAD)
+
+    for remainder in range(HASH_MODULUS):
+        hash_partition = f'authentication_histories_{remainder:03d}'
+        op.execute(f"""CREATE TABLE {hash_partition} PARTITION OF
+            authentication_histories FOR VALUES WITH (MODULUS {HASH_MODULUS}, REMAINDER {remainder})
+            PARTITION BY RANGE (created_at);""")
+        op.execute(f"""CREATE TABLE {hash_partition}_default PARTITION OF
+            {hash_partition} DEFAULT;""")
+
+        month = first_month
+        while month <= last_month:
+            next_month = add_months(month, 1)
+            op.execute(f"""CREATE TABLE {hash_partition}_p{month:%Y_%m} PARTITION OF
+                {hash_partition} FOR VALUES FROM ('{month}') TO ('{next_month}');""")
+            month = next_month
+
+    op.execute(f"""INSERT INTO authentication_histories ({COLUMNS})
+        SELECT id, success, user_agent, user_id, coalesce(created_at, now()), updated_at
+        FROM authentication_histories_old""")
+
+    op.drop_table('authentication_histories_old')
+    create_keyset_index()
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_authentication_histories_user_id_created_at_id',
+        table_name='authentication_histories',
+    )
+    op.rename_table('authentication_histories', 'authentication_histories_ranged')
+
+    create_history_table('authentication_histories', ['id', 'user_id'], 'HASH (user_id)')
+    for remainder in range(HASH_MODULUS):
+        op.execute(f"""ALTER TABLE authentication_histories_{remainder:03d}
+            RENAME TO authentication_histories_ranged_{remainder:03d};""")
+        op.execute(f"""CREATE TABLE authentication_histories_{remainder:03d} PARTITION OF
+            authentication_histories FOR VALUES WITH (MODULUS {HASH_MODULUS}, REMAINDER {remainder});""")
+
+    op.execute(f"""INSERT INTO authentication_histories ({COLUMNS})
+        SELECT {COLUMNS} FROM authentication_histories_ranged""")
+
+    op.drop_table('authentication_histories_ranged')
+    create_keyset_index()
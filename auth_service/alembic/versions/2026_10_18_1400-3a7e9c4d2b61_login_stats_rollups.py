@@ -0,0 +1,67 @@
+"""login-stats-rollups
+
+Revision ID: 3a7e9c4d2b61
+Revises: 8d3f6b1a9e2c
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7e9c4d2b61'
+down_revision: Union[str, None] = '8d3f6b1a9e2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_login_stats',
+                    sa.Column('user_id', sa.UUID(), nullable=False, comment='Идентификатор пользователя'),
+                    sa.Column('day', sa.Date(), nullable=False, comment='Сутки по UTC'),
+                    sa.Column('successes', sa.BigInteger(), nullable=False, comment='Число успешных входов'),
+                    sa.Column('failures', sa.BigInteger(), nullable=False, comment='Число неудачных входов'),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('user_id', 'day'),
+                    comment='Суточная статистика входов пользователей'
+                    )
+    op.create_table('hourly_login_stats',
+                    sa.Column('hour', sa.DateTime(timezone=True), nullable=False, comment='Начало часа по UTC'),
+                    sa.Column('successes', sa.BigInteger(), nullable=False, comment='Число успешных входов'),
+                    sa.Column('failures', sa.BigInteger(), nullable=False, comment='Число неудачных входов'),
+                    sa.PrimaryKeyConstraint('hour'),
+                    comment='Почасовая статистика входов всех пользователей'
+                    )
+
+    # накопленная история переносится в статистику один раз,
+    # дальше ее обновляет запись истории
+    op.execute("""INSERT INTO daily_login_stats (user_id, day, successes, failures)
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date,
+               count(*) FILTER (WHERE success), count(*) FILTER (WHERE NOT success)
+        FROM authentication_histories
+        GROUP BY 1, 2""")
+    op.execute("""INSERT INTO hourly_login_stats (hour, successes, failures)
+        SELECT date_trunc('hour', created_at, 'UTC'),
+               count(*) FILTER (WHERE success), count(*) FILTER (WHERE NOT success)
+        FROM authentication_histories
+        GROUP BY 1""")
+
+    op.create_index(
+        'ix_authentication_histories_created_at_brin',
+        'authentication_histories',
+        ['created_at'],
+        postgresql_using='brin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_authentication_histories_created_at_brin',
+        table_name='authentication_histories',
+        postgresql_using='brin',
+    )
+    op.drop_table('hourly_login_stats')
+    op.drop_table('daily_login_stats')
@@ -0,0 +1,121 @@
+"""user-agents-dictionary
+
+Revision ID: b4d2e8f1c7a3
+Revises: 3a7e9c4d2b61
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d2e8f1c7a3'
+down_revision: Union[str, None] = '3a7e9c4d2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# копия разбора из src/utils/user_agent.py на момент миграции:
+# миграция не должна меняться вместе с кодом приложения
+BROWSER_PATTERNS = (
+    ('Edge', re.compile(r'Edg(e|A|iOS)?/')),
+    ('Opera', re.compile(r'OPR/|Opera')),
+    ('Yandex', re.compile(r'YaBrowser/')),
+    ('Firefox', re.compile(r'Firefox/|FxiOS/')),
+    ('Chrome', re.compile(r'Chrome/|CriOS/')),
+    ('Safari', re.compile(r'Version/[\d.]+.*Safari/')),
+    ('Internet Explorer', re.compile(r'MSIE |Trident/')),
+    ('curl', re.compile(r'^curl/')),
+    ('python', re.compile(r'python|aiohttp', re.IGNORECASE)),
+)
+OS_PATTERNS = (
+    ('Windows', re.compile(r'Windows')),
+    ('Android', re.compile(r'Android')),
+    ('iOS', re.compile(r'iPhone|iPad|iPod')),
+    ('macOS', re.compile(r'Mac OS X|Macintosh')),
+    ('ChromeOS', re.compile(r'CrOS')),
+    ('Linux', re.compile(r'Linux|X11')),
+)
+BOT_PATTERN = re.compile(r'bot|crawl|spider|slurp', re.IGNORECASE)
+TABLET_PATTERN = re.compile(r'iPad|Tablet|Android(?!.*Mobile)')
+MOBILE_PATTERN = re.compile(r'Mobi|iPhone|iPod|Android')
+DESKTOP_OS = {'Windows', 'macOS', 'ChromeOS', 'Linux'}
+
+
+def match_first(patterns: tuple, user_agent: str) -> str | None:
+    return next((name for name, pattern in patterns if pattern.search(user_agent)), None)
+
+
+def parse_user_agent(user_agent: str) -> dict:
+    browser = match_first(BROWSER_PATTERNS, user_agent)
+    os = match_first(OS_PATTERNS, user_agent)
+    if BOT_PATTERN.search(user_agent):
+        device = 'bot'
+    elif TABLET_PATTERN.search(user_agent):
+        device = 'tablet'
+    elif MOBILE_PATTERN.search(user_agent):
+        device = 'mobile'
+    elif os in DESKTOP_OS:
+        device = 'desktop'
+    else:
+        device = 'other'
+
+    return {
+        'hash': hashlib.sha256(user_agent.encode()).hexdigest(),
+        'user_agent': user_agent,
+        'browser': browser,
+        'os': os,
+        'device': device,
+    }
+
+
+def upgrade() -> None:
+    user_agents = op.create_table('user_agents',
+                                  sa.Column('id', sa.Integer(), nullable=False,
+                                            comment='Идентификатор строки User-Agent'),
+                                  sa.Column('hash', sa.String(length=64), nullable=False,
+                                            comment='SHA-256 строки User-Agent для поиска'),
+                                  sa.Column('user_agent', sa.String(), nullable=False, comment='Строка User-Agent'),
+                                  sa.Column('browser', sa.String(length=50), nullable=True, comment='Браузер'),
+                                  sa.Column('os', sa.String(length=50), nullable=True, comment='Операционная система'),
+                                  sa.Column('device', sa.String(length=20), nullable=False, comment='Тип устройства'),
+                                  sa.PrimaryKeyConstraint('id'),
+                                  sa.UniqueConstraint('hash'),
+                                  comment='Справочник браузеров и операционных систем'
+                                  )
+    op.add_column('authentication_histories',
+                  sa.Column('user_agent_id', sa.Integer(), nullable=True,
+                            comment='Браузер и операционная система пользователя из справочника user_agents'))
+    op.create_foreign_key(None, 'authentication_histories', 'user_agents', ['user_agent_id'], ['id'])
+
+    # различных строк немного, поэтому разбор идет в Python, а ссылки
+    # проставляются одним UPDATE
+    connection = op.get_bind()
+    distinct = connection.scalars(sa.text(
+        'SELECT DISTINCT user_agent FROM authentication_histories WHERE user_agent IS NOT NULL'
+    )).all()
+    rows = [parse_user_agent(user_agent) for user_agent in distinct]
+    if rows:
+        op.bulk_insert(user_agents, rows)
+    op.execute("""UPDATE authentication_histories AS history
+        SET user_agent_id = user_agents.id
+        FROM user_agents WHERE user_agents.user_agent = history.user_agent""")
+
+    op.drop_column('authentication_histories', 'user_agent')
+
+
+def downgrade() -> None:
+    op.add_column('authentication_histories',
+                  sa.Column('user_agent', sa.String(), nullable=True,
+                            comment='Информация о браузере и операционной системе пользователя'))
+    op.execute("""UPDATE authentication_histories AS history
+        SET user_agent = user_agents.user_agent
+        FROM user_agents WHERE user_agents.id = history.user_agent_id""")
+    op.drop_constraint('authentication_histories_user_agent_id_fkey', 'authentication_histories',
+                       type_='foreignkey')
+    op.drop_column('authentication_histories', 'user_agent_id')
+    op.drop_table('user_agents')
@@ -1,28 +1,81 @@
+from http import HTTPStatus
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status, Request
-from fastapi_pagination import Page, paginate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from src.constants.permissions import PERMISSIONS
-from src.schemas.auth_history import AuthHistoryInDB
+from src.core.config import settings
+from src.schemas.auth_history import (
+    AuthHistoryPage,
+    DailyLoginReport,
+    HourlyLoginReport,
+)
 from src.services.auth_history import AuthHistoryService
 from src.utils.jwt import check_token_and_role
 
 router = APIRouter(tags=["auth-history"])
 
 
+@router.get(
+    "/stats/hourly",
+    response_model=HourlyLoginReport,
+    status_code=status.HTTP_200_OK,
+    summary="Получение почасовой статистики входов всех пользователей",
+    description="Число успешных и неудачных входов и доля неудачных по часам, "
+                "от новых к старым. Часы без входов не выводятся",
+)
+async def get_hourly_login_stats(
+    request: Request,
+    hours: Annotated[int, Query(ge=1, le=24 * 31)] = 24,
+    service: AuthHistoryService = Depends(AuthHistoryService.read_only),
+) -> HourlyLoginReport:
+    await check_token_and_role(request, PERMISSIONS["can_read_login_stats"])
+
+    return await service.get_hourly_stats(hours)
+
+
 @router.get(
     "/{user_id}",
-    response_model=Page[AuthHistoryInDB],
+    response_model=AuthHistoryPage,
     status_code=status.HTTP_200_OK,
     summary="Получение истории аутентификаций пользователя",
+    description="Записи от новых к старым. Для следующей страницы передайте "
+                "next_cursor в before, для предыдущей - prev_cursor в after",
 )
 async def get_auth_history(
     request: Request,
     user_id: UUID,
-    service: AuthHistoryService = Depends(AuthHistoryService),
-) -> Page[AuthHistoryInDB]:
+    limit: Annotated[int, Query(ge=1, le=100)] = settings.page_size,
+    before: str | None = None,
+    after: str | None = None,
+    service: AuthHistoryService = Depends(AuthHistoryService.read_only),
+) -> AuthHistoryPage:
+    await check_token_and_role(request, PERMISSIONS["can_read_auth_history"])
+
+    if before and after:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Нельзя передавать before и after одновременно",
+        )
+
+    return await service.get_history(user_id, limit, before, after)
+
+
+@router.get(
+    "/{user_id}/stats",
+    response_model=DailyLoginReport,
+    status_code=status.HTTP_200_OK,
+    summary="Получение суточной статистики входов пользователя",
+    description="Число успешных и неудачных входов и доля неудачных по суткам (UTC), "
+                "от новых к старым. Сутки без входов не выводятся",
+)
+async def get_daily_login_stats(
+    request: Request,
+    user_id: UUID,
+    days: Annotated[int, Query(ge=1, le=366)] = 30,
+    service: AuthHistoryService = Depends(AuthHistoryService.read_only),
+) -> DailyLoginReport:
     await check_token_and_role(request, PERMISSIONS["can_read_auth_history"])
 
-    history_items = await service.get_history(user_id)
-    return paginate(history_items)
+    return await service.get_daily_stats(user_id, days)
@@ -13,6 +13,7 @@ from src.schemas.user import Login
 from src.services.oauth import YandexOAuthService
 from src.services.user import UserService
 from src.services.auth_history import AuthHistoryService
+from src.utils.client_ip import get_client_ip
 from src.utils.general import make_random_string
 
 router = APIRouter(tags=["login"])
@@ -26,6 +27,7 @@ router = APIRouter(tags=["login"])
                 "при вводе корректных логина и пароля.",
 )
 async def login(
+    request: Request,
     data: Login,
     response: Response,
     service: UserService = Depends(UserService),
@@ -33,7 +35,12 @@ async def login(
     history_service: AuthHistoryService = Depends(AuthHistoryService),
 ):
     try:
-        res = await service.login(response, data)
+        res = await service.login(
+            response,
+            data,
+            user_agent,
+            get_client_ip(request),
+        )
         await history_service.set_history(
             login=data.user_login, user_agent=user_agent, success=True
         )
@@ -43,6 +50,11 @@ async def login(
         await history_service.set_history(
             login=data.user_login, user_agent=user_agent, success=False
         )
+        if isinstance(exc, HTTPException) and exc.status_code in (
+            HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+        ):
+            raise
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED, detail=f"Что-то пошло не так. "
                                                         f"Проверьте логин или пароль."
@@ -109,17 +121,18 @@ async def oauth_login_redirect(
 
     if oauth_provider == OAuthProviders.YANDEX:
         service_user = await yandex_service.get_service_user(code)
-        user_data = Login(user_login=service_user.login, password=service_user.password)
 
         try:
-            await user_service.login(response, user_data)
+            await user_service.oauth_login(
+                response, service_user, request.headers.get("user-agent")
+            )
             await history_service.set_history(
-                login=user_data.user_login, user_agent=request.headers["user-agent"], success=True
+                login=service_user.login, user_agent=request.headers["user-agent"], success=True
             )
         except Exception as exc:
             auth_logger.error(f"Error while OAuth login: {exc}")
             await history_service.set_history(
-                login=user_data.user_login, user_agent=request.headers["user-agent"], success=False
+                login=service_user.login, user_agent=request.headers["user-agent"], success=False
             )
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED, detail=f"Что-то пошло не так. "
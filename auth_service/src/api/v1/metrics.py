@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Request
+
+from src.constants.permissions import PERMISSIONS
+from src.db.instrumentation import query_instrumentation
+from src.db.pool import pool_metrics
+from src.db.replica import replica_router
+from src.utils.history_writer import auth_history_writer
+from src.utils.jwt import check_token_and_role
+from src.utils.key_ring import key_ring
+from src.utils.password_hashing import password_hasher
+from src.utils.rate_limiter import rate_limiter
+from src.utils.revocation import revocation_list
+from src.utils.role_catalog import role_catalog
+from src.utils.token_cache import verified_token_cache
+from src.utils.user_agent import user_agent_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/",
+    status_code=HTTPStatus.OK,
+    summary="Метрики сервиса",
+)
+async def get_metrics(request: Request) -> dict:
+    await check_token_and_role(request, PERMISSIONS["can_read_metrics"])
+
+    return {
+        "verified_token_cache": verified_token_cache.stats(),
+        "key_ring": key_ring.stats(),
+        "revocation_list": revocation_list.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "password_hasher": password_hasher.stats(),
+        "role_catalog": role_catalog.stats(),
+        "auth_history_writer": auth_history_writer.stats(),
+        "user_agent_cache": user_agent_cache.stats(),
+        "replica_router": replica_router.stats(),
+        "queries": query_instrumentation.stats(),
+        "pools": {name: metrics.stats() for name, metrics in pool_metrics.items()},
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Request, Response, status
 
 from src.schemas.role import RoleGeneral
 from src.constants.permissions import PERMISSIONS
@@ -13,15 +13,21 @@ router = APIRouter(tags=["role"])
     response_model=list[RoleGeneral],
     status_code=status.HTTP_200_OK,
     summary="Просмотр всех ролей",
-    description="Просмотр всех ролей в сервисе",
+    description="Просмотр всех ролей в сервисе. Поддерживает If-None-Match",
 )
 async def roles(
     request: Request,
+    response: Response,
     roles_service: RoleService = Depends(RoleService),
 ) -> list[RoleGeneral]:
     await check_token_and_role(request, PERMISSIONS["can_read_and_perform_roles"])
 
+    etag = await roles_service.get_roles_etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
     all_roles = await roles_service.get_all_roles()
+    response.headers["ETag"] = etag
 
     return all_roles
 
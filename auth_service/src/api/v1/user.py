@@ -3,9 +3,19 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends, Request, status, Response, HTTPException
 
 from src.constants.permissions import PERMISSIONS
-from src.schemas.user import UserCreate, UserInDB, UserInDBWRole, Login
+from src.schemas.login_guard import LockoutInDB
+from src.schemas.session import SessionInDB
+from src.schemas.user import (
+    BulkRoleAssignment,
+    BulkRoleAssignmentResult,
+    Login,
+    UserCreate,
+    UserInDB,
+    UserInDBWRole,
+)
+from src.services.login_guard import LoginGuardService
 from src.services.user import UserService
-from src.utils.jwt import check_token_and_role, validate_token
+from src.utils.jwt import check_token_and_role, get_access_token_claims
 from src.schemas.user import PasswordChange
 
 router = APIRouter(tags=["user"])
@@ -40,6 +50,25 @@ async def change_role(
     return await service.change_user_role(login, role_id)
 
 
+@router.patch(
+    "/roles/bulk",
+    response_model=BulkRoleAssignmentResult,
+    status_code=status.HTTP_200_OK,
+    summary="Смена роли у группы пользователей",
+    description="Пользователи задаются списком logins, списком ids или фильтром filter. "
+                "role_id = null снимает роль. В chunks - число измененных "
+                "пользователей в каждой пачке",
+)
+async def bulk_change_role(
+    request: Request,
+    assignment: BulkRoleAssignment,
+    service: UserService = Depends(UserService),
+) -> BulkRoleAssignmentResult:
+    await check_token_and_role(request, PERMISSIONS["can_read_and_perform_roles"])
+
+    return await service.bulk_change_user_role(assignment)
+
+
 @router.delete(
     "/{login}/roles/{role_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -94,11 +123,127 @@ async def change_password(
     summary="Выход пользователя",
 )
 async def logout(
-    login,
     request: Request,
     response: Response,
     service: UserService = Depends(UserService),
 ):
     refresh_token = request.cookies.get("refresh_token")
-    await validate_token(refresh_token)
-    return await service.logout(login, refresh_token, response)
+    if not refresh_token:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="Пользователь не авторизован, нет рефреш токена в cookies",
+        )
+
+    return await service.logout(refresh_token, response)
+
+
+@router.get(
+    "/sessions",
+    response_model=list[SessionInDB],
+    status_code=status.HTTP_200_OK,
+    summary="Активные сессии пользователя",
+    description="Список устройств, на которых выполнен вход",
+)
+async def sessions(
+    request: Request,
+    service: UserService = Depends(UserService),
+) -> list[SessionInDB]:
+    decoded_token = await get_access_token_claims(request)
+
+    return await service.get_sessions(
+        decoded_token.get("user_login"), decoded_token.get("sid")
+    )
+
+
+@router.delete(
+    "/sessions/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Завершение сессии на устройстве",
+)
+async def session_revoking(
+    request: Request,
+    session_id: str,
+    service: UserService = Depends(UserService),
+) -> None:
+    decoded_token = await get_access_token_claims(request)
+
+    await service.revoke_session(decoded_token.get("user_login"), session_id)
+
+
+@router.delete(
+    "/sessions",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Выход со всех устройств",
+)
+async def all_sessions_revoking(
+    request: Request,
+    response: Response,
+    service: UserService = Depends(UserService),
+) -> None:
+    decoded_token = await get_access_token_claims(request)
+
+    await service.revoke_all_sessions(decoded_token.get("user_login"), response)
+
+
+@router.get(
+    "/lockouts/{login}",
+    response_model=LockoutInDB,
+    status_code=status.HTTP_200_OK,
+    summary="Блокировка входа по логину",
+    description="Число неудачных попыток входа и оставшийся срок блокировки",
+)
+async def login_lockout(
+    request: Request,
+    login: str,
+    service: UserService = Depends(UserService),
+) -> LockoutInDB:
+    await check_token_and_role(request, PERMISSIONS["can_manage_login_lockouts"])
+
+    return await service.get_lockout(LoginGuardService.login_key(login))
+
+
+@router.delete(
+    "/lockouts/{login}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Снятие блокировки входа по логину",
+)
+async def login_lockout_reset(
+    request: Request,
+    login: str,
+    service: UserService = Depends(UserService),
+) -> None:
+    await check_token_and_role(request, PERMISSIONS["can_manage_login_lockouts"])
+
+    await service.reset_lockout(LoginGuardService.login_key(login))
+
+
+@router.get(
+    "/lockouts/clients/{client}",
+    response_model=LockoutInDB,
+    status_code=status.HTTP_200_OK,
+    summary="Блокировка входа по адресу клиента",
+    description="Число неудачных попыток входа и оставшийся срок блокировки",
+)
+async def client_lockout(
+    request: Request,
+    client: str,
+    service: UserService = Depends(UserService),
+) -> LockoutInDB:
+    await check_token_and_role(request, PERMISSIONS["can_manage_login_lockouts"])
+
+    return await service.get_lockout(LoginGuardService.client_key(client))
+
+
+@router.delete(
+    "/lockouts/clients/{client}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Снятие блокировки входа по адресу клиента",
+)
+async def client_lockout_reset(
+    request: Request,
+    client: str,
+    service: UserService = Depends(UserService),
+) -> None:
+    await check_token_and_role(request, PERMISSIONS["can_manage_login_lockouts"])
+
+    await service.reset_lockout(LoginGuardService.client_key(client))
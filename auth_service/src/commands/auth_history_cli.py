@@ -0,0 +1,532 @@
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated
+
+import typer
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.models import AuthenticationHistory
+
+ENGINE = create_engine(f"postgresql+psycopg2://{settings.db_dsn}")
+
+TABLE_NAME = "authentication_histories"
+NEW_TABLE_NAME = f"{TABLE_NAME}_new"
+OLD_TABLE_NAME = f"{TABLE_NAME}_old"
+COLUMNS = ", ".join(column.name for column in AuthenticationHistory.__table__.columns)
+# порядок индекса (user_id, created_at DESC, id DESC), чтобы каждая
+# пачка читалась сканированием индекса без сортировки всей таблицы
+COPY_KEY = "user_id, created_at, id"
+COPY_ORDER = "user_id, created_at DESC, id DESC"
+COPY_ORDER_REVERSED = "user_id DESC, created_at, id"
+COPY_CONDITION = (
+    "WHERE user_id >= :user_id "
+    "AND (user_id > :user_id OR (created_at, id) < (:created_at, :id))"
+)
+MONTH_PARTITION_PATTERN = re.compile(r"(?P<parent>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})")
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Обслуживание таблицы истории аутентификаций
+    """
+
+
+def add_months(day: date, months: int) -> date:
+    """Первое число месяца, отстоящего от day на months месяцев"""
+
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def get_partitions(connection: Connection, parent: str) -> list[str]:
+    """Непосредственные секции таблицы"""
+
+    return list(
+        connection.scalars(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :parent
+                ORDER BY child.relname
+                """
+            ),
+            {"parent": parent},
+        )
+    )
+
+
+def create_month_partition(connection: Connection, hash_partition: str, month: date):
+    """Создание помесячной секции внутри хеш-секции"""
+
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {hash_partition}_p{month:%Y_%m} "
+            f"PARTITION OF {hash_partition} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+    )
+
+
+def get_partition_tree(connection: Connection, table: str) -> list[str]:
+    """Все таблицы дерева секций, начиная с самой таблицы"""
+
+    return list(
+        connection.scalars(
+            text(
+                "SELECT relid::text FROM pg_partition_tree(CAST(:table AS regclass)) "
+                "ORDER BY level"
+            ),
+            {"table": table},
+        )
+    )
+
+
+def create_history_table_like(connection: Connection, table: str, source: str) -> None:
+    """
+    Пустая секционированная таблица со схемой действующей таблицы.
+    Ограничения и индексы получают суффикс _new, чтобы не конфликтовать
+    с действующими, и переименовываются при подмене
+    """
+
+    connection.execute(
+        text(
+            f"CREATE TABLE {table} (LIKE {source} INCLUDING DEFAULTS "
+            f"INCLUDING CONSTRAINTS INCLUDING COMMENTS) PARTITION BY HASH (user_id)"
+        )
+    )
+    comment = connection.scalar(
+        text("SELECT obj_description(CAST(:table AS regclass), 'pg_class')"),
+        {"table": source},
+    )
+    if comment:
+        comment = comment.replace("'", "''")
+        connection.execute(text(f"COMMENT ON TABLE {table} IS '{comment}'"))
+
+    for name, definition in get_constraints(connection, source):
+        connection.execute(
+            text(f"ALTER TABLE {table} ADD CONSTRAINT {name}_new {definition}")
+        )
+    for name, definition in get_indexes(connection, source):
+        connection.execute(
+            text(f"CREATE INDEX {name}_new ON {table} USING {definition}")
+        )
+
+
+def get_constraints(connection: Connection, table: str) -> list[tuple[str, str]]:
+    """Уникальные и внешние ключи таблицы"""
+
+    return list(
+        connection.execute(
+            text(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = CAST(:table AS regclass) AND contype IN ('u', 'f')"
+            ),
+            {"table": table},
+        )
+    )
+
+
+def get_indexes(connection: Connection, table: str) -> list[tuple[str, str]]:
+    """Индексы таблицы, не созданные ограничениями, с определением после USING"""
+
+    return [
+        (name, definition.split(" USING ", 1)[1])
+        for name, definition in connection.execute(
+            text(
+                "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) "
+                "FROM pg_index WHERE indrelid = CAST(:table AS regclass) "
+                "AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = indexrelid)"
+            ),
+            {"table": table},
+        )
+    ]
+
+
+def create_hash_partitions(
+    connection: Connection, table: str, partitions: int, first_month: date, ahead: int
+) -> None:
+    """Хеш-секции по user_id, каждая из которых делится на помесячные секции"""
+
+    last_month = add_months(datetime.now(timezone.utc).date().replace(day=1), ahead)
+    for remainder in range(partitions):
+        hash_partition = f"{table}_{remainder:03d}"
+        connection.execute(
+            text(
+                f"CREATE TABLE {hash_partition} PARTITION OF {table} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder}) "
+                f"PARTITION BY RANGE (created_at)"
+            )
+        )
+        connection.execute(
+            text(f"CREATE TABLE {hash_partition}_default PARTITION OF {hash_partition} DEFAULT")
+        )
+
+        month = first_month
+        while month <= last_month:
+            create_month_partition(connection, hash_partition, month)
+            month = add_months(month, 1)
+
+
+def copy_batch_query(cursor: tuple | None) -> str:
+    """
+    Выборка следующей пачки после ключа cursor. Условие user_id >= :user_id
+    становится границей сканирования индекса, остальное - фильтром
+    по строкам одного пользователя
+    """
+
+    condition = COPY_CONDITION if cursor else ""
+
+    return (
+        f"SELECT {COLUMNS} FROM {TABLE_NAME} {condition} "
+        f"ORDER BY {COPY_ORDER} LIMIT :batch_size"
+    )
+
+
+def copy_batch_params(cursor: tuple | None, batch_size: int) -> dict:
+    return {
+        **dict(zip(("user_id", "created_at", "id"), cursor or ())),
+        "batch_size": batch_size,
+    }
+
+
+def get_copy_plan_problems(
+    connection: Connection, cursor: tuple | None, batch_size: int
+) -> list[str]:
+    """
+    Узлы плана пачки, из-за которых каждая пачка читает всю таблицу:
+    последовательное сканирование и сортировка
+    """
+
+    plan = connection.scalar(
+        text(f"EXPLAIN (FORMAT JSON) {copy_batch_query(cursor)}"),
+        copy_batch_params(cursor, batch_size),
+    )
+    problems, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] in ("Seq Scan", "Sort", "Incremental Sort"):
+            problems.append(f"{node['Node Type']} {node.get('Relation Name', '')}".strip())
+        nodes.extend(node.get("Plans", []))
+
+    return problems
+
+
+def get_first_copy_key(connection: Connection) -> tuple | None:
+    row = connection.execute(
+        text(f"SELECT {COPY_KEY} FROM {TABLE_NAME} ORDER BY {COPY_ORDER} LIMIT 1")
+    ).first()
+
+    return tuple(row) if row else None
+
+
+def copy_batch(
+    connection: Connection, cursor: tuple | None, batch_size: int
+) -> tuple[int, tuple | None]:
+    """
+    Копирование следующей пачки строк в порядке индекса
+    (user_id, created_at DESC, id DESC).
+    Возвращает число строк и ключ последней из них
+    """
+
+    row = connection.execute(
+        text(
+            f"""
+            WITH batch AS (
+                {copy_batch_query(cursor)}
+            ), inserted AS (
+                INSERT INTO {NEW_TABLE_NAME} ({COLUMNS})
+                SELECT {COLUMNS} FROM batch
+                ON CONFLICT DO NOTHING
+            )
+            SELECT (SELECT count(*) FROM batch), {COPY_KEY} FROM batch
+            ORDER BY {COPY_ORDER_REVERSED} LIMIT 1
+            """
+        ),
+        copy_batch_params(cursor, batch_size),
+    ).first()
+
+    if row is None:
+        return 0, None
+
+    return row[0], tuple(row[1:])
+
+
+def copy_since(connection: Connection, since: datetime) -> tuple[int, datetime | None]:
+    """
+    Дозапись строк с created_at не раньше since.
+    Возвращает число добавленных строк и наибольший created_at среди
+    просмотренных - отметку, с которой продолжать следующую дозапись
+    """
+
+    row = connection.execute(
+        text(
+            f"""
+            WITH recent AS (
+                SELECT {COLUMNS} FROM {TABLE_NAME} WHERE created_at >= :since
+            ), inserted AS (
+                INSERT INTO {NEW_TABLE_NAME} ({COLUMNS})
+                SELECT {COLUMNS} FROM recent
+                ON CONFLICT DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM inserted), (SELECT max(created_at) FROM recent)
+            """
+        ),
+        {"since": since},
+    ).first()
+
+    return row[0], row[1]
+
+
+def rename_partition_tree(
+    connection: Connection, table: str, old_prefix: str, new_prefix: str
+) -> None:
+    for relation in get_partition_tree(connection, table):
+        connection.execute(
+            text(
+                f"ALTER TABLE {relation} "
+                f"RENAME TO {new_prefix}{relation.removeprefix(old_prefix)}"
+            )
+        )
+
+
+@app.command("maintain-partitions")
+def maintain_partitions(
+    ahead: Annotated[
+        int, typer.Option(help="На сколько месяцев вперед создавать секции")
+    ] = settings.auth_history_partitions_ahead_months,
+    retention: Annotated[
+        int, typer.Option(help="Сколько месяцев хранить историю, 0 - бессрочно")
+    ] = settings.auth_history_retention_months,
+    keep_detached: Annotated[
+        bool, typer.Option(help="Не удалять отсоединенные секции")
+    ] = False,
+    dry_run: Annotated[bool, typer.Option(help="Только показать изменения")] = False,
+):
+    """
+    Создание будущих помесячных секций и удаление секций старше срока хранения.
+    Удаление истории - отсоединение секции, а не DELETE по таблице
+    """
+
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+    oldest_kept_month = add_months(current_month, -retention) if retention > 0 else None
+
+    with ENGINE.connect() as connection:
+        hash_partitions = get_partitions(connection, TABLE_NAME)
+
+    for hash_partition in hash_partitions:
+        for months in range(ahead + 1):
+            month = add_months(current_month, months)
+            typer.echo(f"Секция {hash_partition}_p{month:%Y_%m}")
+            if dry_run:
+                continue
+            try:
+                with ENGINE.begin() as connection:
+                    create_month_partition(connection, hash_partition, month)
+            except Exception as exc:
+                auth_logger.error(
+                    f"Не удалось создать секцию {hash_partition}_p{month:%Y_%m}: {exc}"
+                )
+
+        if oldest_kept_month is None:
+            continue
+
+        with ENGINE.connect() as connection:
+            month_partitions = get_partitions(connection, hash_partition)
+
+        for month_partition in month_partitions:
+            match = MONTH_PARTITION_PATTERN.fullmatch(month_partition)
+            if not match:
+                continue
+            month = date(int(match["year"]), int(match["month"]), 1)
+            if month >= oldest_kept_month:
+                continue
+
+            action = "отсоединение" if keep_detached else "удаление"
+            typer.echo(f"{action.capitalize()} секции {month_partition}")
+            if dry_run:
+                continue
+            with ENGINE.begin() as connection:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {hash_partition} "
+                        f"DETACH PARTITION {month_partition}"
+                    )
+                )
+                if not keep_detached:
+                    connection.execute(text(f"DROP TABLE {month_partition}"))
+            auth_logger.info(f"Секция {month_partition}: {action} по сроку хранения")
+
+
+@app.command("explain-copy")
+def explain_copy(
+    batch_size: Annotated[int, typer.Option(help="Строк в одной пачке")] = 5000,
+):
+    """
+    Проверка плана запроса пачки для repartition: пачка должна читаться
+    сканированием индекса, без последовательного сканирования и сортировки
+    """
+
+    with ENGINE.connect() as connection:
+        cursor = get_first_copy_key(connection)
+        problems = get_copy_plan_problems(connection, cursor, batch_size)
+
+    if problems:
+        typer.echo(f"Пачка читается без индекса: {', '.join(problems)}")
+        raise typer.Exit(1)
+
+    typer.echo("Пачка читается сканированием индекса")
+
+
+@app.command("repartition")
+def repartition(
+    partitions: Annotated[int, typer.Argument(help="Новое число хеш-секций")],
+    batch_size: Annotated[int, typer.Option(help="Строк в одной пачке")] = 5000,
+    sleep_ms: Annotated[
+        int, typer.Option(help="Пауза между пачками для снижения нагрузки")
+    ] = 50,
+    catch_up_minutes: Annotated[
+        int,
+        typer.Option(help="Окно до начала копирования, дописываемое после него"),
+    ] = 10,
+    late_seconds: Annotated[
+        int,
+        typer.Option(help="На сколько created_at строки может отставать от ее записи"),
+    ] = 30,
+    lock_timeout_seconds: Annotated[
+        int, typer.Option(help="Сколько ждать блокировку таблицы для подмены")
+    ] = 5,
+    drop_old: Annotated[
+        bool, typer.Option(help="Удалить старую таблицу после подмены")
+    ] = False,
+):
+    """
+    Перенос истории аутентификаций на новое число хеш-секций без остановки сервиса.
+
+    Строки копируются пачками в новую таблицу, пока сервис пишет в старую.
+    Затем без блокировки дописываются строки, появившиеся за время
+    копирования, и запоминается наибольший created_at среди них. Дозапись
+    повторяется от этой отметки, пока новых строк не станет меньше пачки.
+    Под блокировкой дописывается только остаток после последней отметки,
+    и таблицы меняются местами переименованием.
+    История только дополняется, поэтому для дозаписи достаточно окна
+    по created_at; late_seconds учитывает строки, которые фоновая запись
+    истории сохраняет с опозданием
+    """
+
+    started_at = datetime.now(timezone.utc)
+    with ENGINE.begin() as connection:
+        if connection.scalar(text("SELECT to_regclass(:table)"), {"table": NEW_TABLE_NAME}):
+            typer.echo(f"Таблица {NEW_TABLE_NAME} уже существует, удалите ее вручную")
+            raise typer.Exit(1)
+        if connection.scalar(text("SELECT to_regclass(:table)"), {"table": OLD_TABLE_NAME}):
+            typer.echo(f"Таблица {OLD_TABLE_NAME} уже существует, удалите ее вручную")
+            raise typer.Exit(1)
+
+        first_created_at = connection.scalar(
+            text(f"SELECT min(created_at) FROM {TABLE_NAME}")
+        )
+        estimated_rows = int(
+            connection.scalar(
+                text(
+                    "SELECT coalesce(sum(reltuples), 0) FROM pg_class WHERE oid IN "
+                    "(SELECT relid FROM pg_partition_tree(CAST(:table AS regclass)) "
+                    "WHERE isleaf)"
+                ),
+                {"table": TABLE_NAME},
+            )
+        )
+
+        create_history_table_like(connection, NEW_TABLE_NAME, TABLE_NAME)
+        first_month = (first_created_at or started_at).date().replace(day=1)
+        create_hash_partitions(
+            connection,
+            NEW_TABLE_NAME,
+            partitions,
+            first_month,
+            settings.auth_history_partitions_ahead_months,
+        )
+    typer.echo(f"Создана таблица {NEW_TABLE_NAME} с {partitions} хеш-секциями")
+
+    with ENGINE.connect() as connection:
+        problems = get_copy_plan_problems(
+            connection, get_first_copy_key(connection), batch_size
+        )
+    if problems:
+        auth_logger.warning(
+            f"Пачки копирования читаются без индекса ({', '.join(problems)}), "
+            f"каждая пачка будет просматривать всю таблицу"
+        )
+
+    copied, cursor, batch_started_at = 0, None, time.monotonic()
+    while True:
+        with ENGINE.begin() as connection:
+            batch_rows, last_key = copy_batch(connection, cursor, batch_size)
+        if not batch_rows:
+            break
+
+        copied += batch_rows
+        cursor = last_key
+        rate = copied / max(time.monotonic() - batch_started_at, 1e-6)
+        typer.echo(
+            f"Скопировано {copied} из ~{max(estimated_rows, copied)} строк "
+            f"({rate:.0f} строк/с)"
+        )
+        time.sleep(sleep_ms / 1000)
+
+    since, caught_up = started_at - timedelta(minutes=catch_up_minutes), 0
+    while True:
+        with ENGINE.begin() as connection:
+            inserted, high_water_mark = copy_since(connection, since)
+        caught_up += inserted
+        if high_water_mark:
+            since = high_water_mark - timedelta(seconds=late_seconds)
+        typer.echo(f"Дописано {inserted} строк, следующая отметка {since}")
+        if inserted < batch_size:
+            break
+
+    with ENGINE.begin() as connection:
+        connection.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout_seconds}s'"))
+        connection.execute(text(f"LOCK TABLE {TABLE_NAME} IN ACCESS EXCLUSIVE MODE"))
+
+        locked_caught_up, _ = copy_since(connection, since)
+
+        constraints = [name for name, _ in get_constraints(connection, TABLE_NAME)]
+        indexes = [name for name, _ in get_indexes(connection, TABLE_NAME)]
+        rename_partition_tree(connection, TABLE_NAME, TABLE_NAME, OLD_TABLE_NAME)
+        rename_partition_tree(connection, NEW_TABLE_NAME, NEW_TABLE_NAME, TABLE_NAME)
+        for name in constraints:
+            connection.execute(
+                text(f"ALTER TABLE {OLD_TABLE_NAME} RENAME CONSTRAINT {name} TO {name}_old")
+            )
+            connection.execute(
+                text(f"ALTER TABLE {TABLE_NAME} RENAME CONSTRAINT {name}_new TO {name}")
+            )
+        for name in indexes:
+            connection.execute(text(f"ALTER INDEX {name} RENAME TO {name}_old"))
+            connection.execute(text(f"ALTER INDEX {name}_new RENAME TO {name}"))
+
+        if drop_old:
+            connection.execute(text(f"DROP TABLE {OLD_TABLE_NAME}"))
+
+    auth_logger.info(
+        f"История аутентификаций перенесена на {partitions} хеш-секций: "
+        f"{copied} строк пачками, {caught_up} строк дозаписью, "
+        f"{locked_caught_up} строк под блокировкой"
+    )
+    if not drop_old:
+        typer.echo(f"Старая таблица сохранена как {OLD_TABLE_NAME}")
+
+
+if __name__ == "__main__":
+    app()
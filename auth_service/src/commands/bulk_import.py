@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import islice
+from pathlib import Path
+from typing import Annotated, Any, Iterable, Iterator, Optional
+
+import orjson
+import typer
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.models import Role
+from src.utils.password_hashing import hash_password, password_policy
+
+ENGINE = create_engine(f"postgresql+psycopg2://{settings.db_dsn}")
+
+STAGING_TABLE_NAME = "bulk_import_users"
+COLUMNS = ("id", "login", "email", "password", "first_name", "last_name", "role_id")
+REQUIRED_FIELDS = ("login", "email", "password")
+
+app = typer.Typer()
+
+
+class InputFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+@app.callback()
+def main():
+    """
+    Массовый импорт пользователей
+    """
+
+
+def read_records(path: Path, input_format: InputFormat) -> Iterator[dict[str, Any]]:
+    """Потоковое чтение записей из CSV с заголовком или из NDJSON"""
+
+    with open(path, newline="", encoding="utf-8") as file:
+        if input_format == InputFormat.csv:
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield orjson.loads(line)
+
+
+def is_valid(record: dict[str, Any], pre_hashed: bool = False) -> bool:
+    """
+    Все обязательные поля заполнены, а готовый хеш пароля проверяется
+    текущей политикой: иначе пользователь не смог бы войти
+    """
+
+    if not all(
+        isinstance(record.get(field), str) and record[field]
+        for field in REQUIRED_FIELDS
+    ):
+        return False
+
+    return not pre_hashed or password_policy.can_verify(record["password"])
+
+
+def read_checkpoint(path: Path) -> dict[str, int]:
+    if not path.exists():
+        return {"records": 0, "inserted": 0, "skipped": 0, "invalid": 0}
+
+    return json.loads(path.read_text())
+
+
+def write_checkpoint(path: Path, checkpoint: dict[str, int]) -> None:
+    """Атомарная запись контрольной точки, чтобы сбой не оставил ее пустой"""
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+def copy_users(connection, rows: Iterable[tuple]) -> int:
+    """
+    Запись пачки пользователей через COPY во временную таблицу
+    и перенос в users с пропуском занятых логинов и email.
+    Возвращает число добавленных пользователей
+    """
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    columns = ", ".join(COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE_NAME} "
+            f"(LIKE users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE_NAME} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        cursor.execute(
+            f"INSERT INTO users ({columns}, created_at) "
+            f"SELECT {columns}, created_at FROM {STAGING_TABLE_NAME} "
+            f"ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+    connection.commit()
+
+    return inserted
+
+
+@app.command("bulk-import")
+def bulk_import(
+    path: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    input_format: Annotated[
+        Optional[InputFormat],
+        typer.Option("--format", help="Формат файла, по умолчанию по расширению"),
+    ] = None,
+    pre_hashed: Annotated[
+        bool,
+        typer.Option(
+            help="Пароли уже захешированы и записываются как есть, "
+                 "хеши неподдерживаемых алгоритмов считаются некорректными"
+        ),
+    ] = False,
+    role_name: Annotated[
+        Optional[str], typer.Option("--role", help="Роль всех импортируемых пользователей")
+    ] = None,
+    batch_size: Annotated[int, typer.Option(help="Пользователей в одной пачке")] = 5000,
+    workers: Annotated[
+        int, typer.Option(help="Процессов для хеширования паролей")
+    ] = settings.password_hashing_workers,
+    checkpoint_path: Annotated[
+        Optional[Path],
+        typer.Option("--checkpoint", help="Файл контрольной точки, по умолчанию <path>.checkpoint"),
+    ] = None,
+):
+    """
+    Импорт пользователей из CSV или NDJSON с полями login, email, password,
+    first_name, last_name.
+
+    Пароли хешируются текущей политикой в пуле процессов, пока предыдущая
+    пачка записывается в БД. Пользователи с занятыми логином или email
+    пропускаются. После каждой пачки сохраняется контрольная точка,
+    и повторный запуск продолжает импорт с нее
+    """
+
+    input_format = input_format or (
+        InputFormat.ndjson if path.suffix in (".ndjson", ".jsonl") else InputFormat.csv
+    )
+    checkpoint_path = checkpoint_path or path.with_name(path.name + ".checkpoint")
+    checkpoint = read_checkpoint(checkpoint_path)
+    if checkpoint["records"]:
+        typer.echo(f"Продолжение импорта с записи {checkpoint['records']}")
+
+    role_id = None
+    if role_name:
+        with Session(ENGINE) as session:
+            role_id = session.scalar(select(Role.id).where(Role.name == role_name))
+        if role_id is None:
+            typer.echo(f"Роль '{role_name}' не найдена")
+            raise typer.Exit(1)
+
+    records = islice(read_records(path, input_format), checkpoint["records"], None)
+    batches = iter(lambda: list(islice(records, batch_size)), [])
+    started_at, imported = time.monotonic(), 0
+
+    def prepare(batch: list[dict[str, Any]]) -> tuple[int, list[dict[str, Any]], Iterator[str]]:
+        """Запуск хеширования паролей пачки, результат забирается при записи"""
+
+        valid = [record for record in batch if is_valid(record, pre_hashed)]
+        passwords = [record["password"] for record in valid]
+        if pre_hashed:
+            return len(batch), valid, iter(passwords)
+
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return len(batch), valid, executor.map(hash_password, passwords, chunksize=chunksize)
+
+    def write(prepared: tuple[int, list[dict[str, Any]], Iterator[str]]) -> None:
+        nonlocal imported
+
+        size, valid, hashes = prepared
+        rows = [
+            (
+                uuid.uuid4(),
+                record["login"],
+                record["email"],
+                password,
+                record.get("first_name") or None,
+                record.get("last_name") or None,
+                role_id,
+            )
+            for record, password in zip(valid, hashes)
+        ]
+        inserted = copy_users(connection, rows) if rows else 0
+
+        checkpoint["records"] += size
+        checkpoint["inserted"] += inserted
+        checkpoint["skipped"] += len(rows) - inserted
+        checkpoint["invalid"] += size - len(valid)
+        write_checkpoint(checkpoint_path, checkpoint)
+
+        imported += size
+        rate = imported / max(time.monotonic() - started_at, 1e-6)
+        typer.echo(
+            f"Обработано {checkpoint['records']}: добавлено {checkpoint['inserted']}, "
+            f"занято {checkpoint['skipped']}, некорректно {checkpoint['invalid']} "
+            f"({rate:.0f} записей/с)"
+        )
+
+    connection = ENGINE.raw_connection()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # пока пачка пишется в БД, пароли следующей уже хешируются
+            pending = None
+            for batch in batches:
+                prepared = prepare(batch)
+                if pending:
+                    write(pending)
+                pending = prepared
+            if pending:
+                write(pending)
+    finally:
+        connection.close()
+
+    checkpoint_path.unlink(missing_ok=True)
+    auth_logger.info(
+        f"Импорт пользователей из '{path}' завершен: добавлено {checkpoint['inserted']}, "
+        f"занято {checkpoint['skipped']}, некорректно {checkpoint['invalid']}"
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Annotated, Optional
+
+import orjson
+import typer
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.helpers.key_pair_generation import serialize_key_pair
+from src.utils.keys_file import parse_keys_file
+from src.utils.token_algorithms import get_token_algorithm
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Ротация ключей подписи JWT в файле AUTH_KEYS_FILE
+    """
+
+
+def keys_from_settings() -> dict:
+    """
+    Файл ключей из ключей в настройках, чтобы выданные
+    ими токены остались действительными
+    """
+
+    keys = {
+        settings.auth_key_id: {
+            "private_key": settings.private_key,
+            "public_key": settings.public_key,
+        }
+    }
+    for kid, public_key in settings.auth_verification_keys.items():
+        keys[kid] = {
+            "public_key": public_key,
+            "expires_at": time.time() + settings.auth_keys_retain_seconds,
+        }
+
+    return {"signing_kid": settings.auth_key_id, "keys": keys}
+
+
+def write_keys_file(path: Path, data: dict) -> None:
+    """
+    Запись через временный файл и переименование: воркеры
+    никогда не читают наполовину записанный файл
+    """
+
+    parse_keys_file(data)
+    descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as temp_file:
+            temp_file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+@app.command("rotate")
+def rotate(
+    algorithm: Annotated[
+        str, typer.Option(help="Алгоритм нового ключа: RS256, ES256 или EdDSA")
+    ] = settings.auth_algorithm,
+    kid: Annotated[
+        Optional[str], typer.Option(help="kid нового ключа, по умолчанию - текущее время")
+    ] = None,
+):
+    """
+    Новый ключ подписи в файле ключей.
+
+    Прежний ключ подписи остается ключом проверки на AUTH_KEYS_RETAIN_SECONDS,
+    пока не истекут подписанные им токены, истекшие ключи удаляются.
+    Воркеры перечитывают файл в течение AUTH_KEYS_CHECK_INTERVAL_SECONDS.
+    Если файла нет, он создается из ключей в настройках
+    """
+
+    if not settings.auth_keys_file:
+        typer.echo("Не задан AUTH_KEYS_FILE")
+        raise typer.Exit(1)
+
+    path = Path(settings.auth_keys_file)
+    data = orjson.loads(path.read_bytes()) if path.exists() else keys_from_settings()
+    kid = kid or f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    if kid in data["keys"]:
+        typer.echo(f"Ключ '{kid}' уже есть в файле ключей")
+        raise typer.Exit(1)
+
+    now = time.time()
+    previous = data["keys"][data["signing_kid"]]
+    previous.pop("private_key", None)
+    previous["expires_at"] = now + settings.auth_keys_retain_seconds
+    data["keys"] = {
+        key_id: entry
+        for key_id, entry in data["keys"].items()
+        if entry.get("expires_at") is None or entry["expires_at"] > now
+    }
+
+    private_key = get_token_algorithm(algorithm).generate_private_key()
+    pem_private_key, pem_public_key = serialize_key_pair(private_key)
+    data["keys"][kid] = {
+        "private_key": pem_private_key.decode(),
+        "public_key": pem_public_key.decode(),
+    }
+    previous_kid, data["signing_kid"] = data["signing_kid"], kid
+
+    write_keys_file(path, data)
+    auth_logger.info(f"Ключ подписи JWT заменен: '{previous_kid}' -> '{kid}'")
+    typer.echo(
+        f"Подпись ключом '{kid}' ({algorithm}), ключ '{previous_kid}' "
+        f"принимается до {datetime.fromtimestamp(previous['expires_at'], timezone.utc)}"
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from src.core.config import settings
 from src.core.logger import auth_logger
 from src.db.models import User, Role
+from src.utils.password_hashing import password_hasher
 
 ENGINE = create_engine(f"postgresql+psycopg2://{settings.db_dsn}")
 
@@ -41,7 +42,7 @@ def create_admin(
                 admin_user = User(
                     login=login,
                     email=email,
-                    password=password,
+                    password=password_hasher.hash_blocking(password),
                     first_name=first_name,
                     last_name=last_name,
                 )
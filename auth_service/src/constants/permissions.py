@@ -1,4 +1,7 @@
 PERMISSIONS = {
     "can_read_and_perform_roles": ["admin"],
     "can_read_auth_history": ["admin", "general", "subscriber"],
+    "can_manage_login_lockouts": ["admin"],
+    "can_read_login_stats": ["admin"],
+    "can_read_metrics": ["admin"],
 }
@@ -1,7 +1,10 @@
 from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
+from typing import Literal
 
 from dotenv import load_dotenv
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +15,12 @@ class Settings(BaseSettings):
     secret_key: str
 
     auth_algorithm: str
+    auth_key_id: str = "default"
+    auth_verification_keys: dict[str, str] = {}
+    auth_keys_file: str | None = None
+    auth_keys_check_interval_seconds: float = 5.0
+    # не меньше срока жизни refresh токена
+    auth_keys_retain_seconds: int = 864000
     public_key: str
     private_key: str
     yandex_oauth_client_id: str
@@ -22,6 +31,17 @@ class Settings(BaseSettings):
     yandex_oauth_info_url: str
 
     db_dsn: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 100
+    db_pgbouncer: bool = False
+    db_replica_dsn: str | None = None
+    db_replica_max_lag_seconds: float = 5.0
+    db_replica_check_interval_seconds: float = 1.0
+    read_your_writes_seconds: int = 10
     postgres_host: str
     postgres_port: int
     postgres_db: str
@@ -43,9 +63,66 @@ class Settings(BaseSettings):
     page_size: int = 10
     page_number: int = 1
 
-    echo: bool = True
+    echo: bool = False
+    query_sample_rate: float = 1.0
+    slow_query_ms: float = 200.0
+    query_stats_max_statements: int = 500
 
     request_limit_per_minute: int = 20
+    rate_limit_period_seconds: int = 60
+    rate_limit_backend: Literal["redis", "hybrid"] = "redis"
+    rate_limit_sync_interval_ms: int = 200
+    rate_limit_local_burst: int = 5
+
+    trusted_proxies: list[str] = ["127.0.0.1", "::1"]
+
+    login_guard_max_failures: int = 5
+    login_guard_client_max_failures: int = 20
+    login_guard_failure_window_seconds: int = 900
+    login_guard_base_lockout_seconds: int = 30
+    login_guard_max_lockout_seconds: int = 3600
+
+    password_hashing_executor: Literal["thread", "process"] = "thread"
+    password_hashing_workers: int = 4
+    password_hashing_queue_size: int = 64
+    password_hash_algorithm: Literal["argon2id", "scrypt", "pbkdf2"] = "scrypt"
+    password_hash_pbkdf2_iterations: int = 600000
+    password_hash_scrypt_n: int = 32768
+    password_hash_scrypt_r: int = 8
+    password_hash_scrypt_p: int = 1
+    password_hash_argon2_time_cost: int = 3
+    password_hash_argon2_memory_cost: int = 65536
+    password_hash_argon2_parallelism: int = 4
+
+    auth_history_batch_size: int = 500
+    auth_history_flush_interval_ms: int = 1000
+    auth_history_max_queue_size: int = 10000
+    auth_history_max_retries: int = 3
+    auth_history_retry_backoff_ms: int = 100
+    auth_history_partitions_ahead_months: int = 3
+    auth_history_retention_months: int = 12
+    user_agent_cache_max_size: int = 10000
+
+    bulk_role_chunk_size: int = 1000
+
+    token_cache_max_size: int = 10000
+
+    refresh_token_mode: Literal["jwt", "opaque"] = "jwt"
+
+    revocation_bloom_capacity: int = 100000
+    revocation_bloom_error_rate: float = 0.001
+    revocation_bloom_rebuild_seconds: int = 300
+
+    @model_validator(mode="after")
+    def check_password_hash_algorithm(self) -> "Settings":
+        """argon2id доступен, только если установлен argon2-cffi"""
+
+        if self.password_hash_algorithm == "argon2id" and find_spec("argon2") is None:
+            raise ValueError(
+                "PASSWORD_HASH_ALGORITHM=argon2id требует пакет argon2-cffi"
+            )
+
+        return self
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).resolve().parent.parent.parent / ".env", extra="ignore"
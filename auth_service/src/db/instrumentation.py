@@ -0,0 +1,210 @@
+import random
+import re
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+
+# верхние границы корзин гистограммы в миллисекундах
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+OTHER_STATEMENTS = "<other>"
+START_ATTRIBUTE = "_query_started_at"
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+CAST = re.compile(
+    r"::(?:(?:TIMESTAMP|TIME) WITH(?:OUT)? TIME ZONE|DOUBLE PRECISION|\w+(?:\(\d+\))?)"
+    r"(?:\[\])*",
+    re.IGNORECASE,
+)
+PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Приведение запроса к виду, общему для всех его выполнений:
+    литералы и параметры заменяются на ?, приведения типов параметров
+    убираются, списки параметров IN (...) и строки VALUES пакетной
+    вставки схлопываются, пробелы нормализуются.
+    Запросы ORM компилируются в одни и те же строки, поэтому
+    результат кэшируется
+    """
+
+    statement = CAST.sub("", STRING_LITERAL.sub("?", statement))
+    statement = NUMBER_LITERAL.sub("?", statement)
+    statement = PLACEHOLDER.sub("?", statement)
+    statement = PLACEHOLDER_LIST.sub("(...)", statement)
+    statement = ROW_LIST.sub("(...), ...", statement)
+
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def bind_shape(parameters: Any, executemany: bool) -> str:
+    """Типы параметров запроса без значений, чтобы в лог не попали пароли и токены"""
+
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = bind_shape(parameters[0], False) if parameters else "()"
+        return f"{len(parameters)} x {first}"
+
+    if isinstance(parameters, dict):
+        items = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in parameters.items()
+        )
+        return "{" + items + "}"
+
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+    return type(parameters).__name__
+
+
+class LatencyHistogram:
+    """Гистограмма времени выполнения одного нормализованного запроса"""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница корзины, в которую он попал"""
+
+        rank, seen = q * self.count, 0
+        for upper_bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return upper_bound
+
+        return self.max_ms
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                **{
+                    f"le_{upper_bound}": count
+                    for upper_bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+                },
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class QueryInstrumentation:
+    """
+    Замер времени SQL-запросов через события движка SQLAlchemy.
+
+    Замеряется доля sample_rate выполнений. Время каждого замеренного
+    запроса попадает в гистограмму его нормализованного текста, запросы
+    дольше slow_query_ms пишутся в лог с типами параметров.
+    Различных запросов учитывается не больше max_statements, остальные
+    попадают в общую гистограмму OTHER_STATEMENTS
+    """
+
+    def __init__(
+        self, sample_rate: float, slow_query_ms: float, max_statements: int
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.sampled = 0
+        self.skipped = 0
+        self.slow = 0
+
+    def attach(self, engine: Engine) -> None:
+        """Подписка на события движка, для асинхронного - engine.sync_engine"""
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        if context is None:
+            return
+
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.skipped += 1
+            setattr(context, START_ATTRIBUTE, None)
+            return
+
+        setattr(context, START_ATTRIBUTE, time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        started_at = getattr(context, START_ATTRIBUTE, None)
+        if started_at is None:
+            return
+
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        self.observe(statement, elapsed_ms)
+
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow += 1
+            auth_logger.warning(
+                f"Медленный запрос {elapsed_ms:.1f} мс: {WHITESPACE.sub(' ', statement)} "
+                f"параметры {bind_shape(parameters, executemany)}"
+            )
+
+    def observe(self, statement: str, elapsed_ms: float) -> None:
+        self.sampled += 1
+        key = normalize_statement(statement)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            if len(self.histograms) >= self.max_statements:
+                key = OTHER_STATEMENTS
+            histogram = self.histograms.setdefault(key, LatencyHistogram())
+
+        histogram.observe(elapsed_ms)
+
+    def stats(self, top: int = 20) -> dict[str, Any]:
+        """Счетчики и гистограммы top запросов с наибольшим суммарным временем"""
+
+        heaviest = sorted(
+            self.histograms.items(), key=lambda item: item[1].total_ms, reverse=True
+        )[:top]
+
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_query_ms": self.slow_query_ms,
+            "sampled": self.sampled,
+            "skipped": self.skipped,
+            "slow": self.slow,
+            "statements": len(self.histograms),
+            "top": [
+                {"statement": statement, **histogram.stats()}
+                for statement, histogram in heaviest
+            ],
+        }
+
+
+query_instrumentation = QueryInstrumentation(
+    settings.query_sample_rate,
+    settings.slow_query_ms,
+    settings.query_stats_max_statements,
+)
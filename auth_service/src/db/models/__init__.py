@@ -1,4 +1,6 @@
 from src.db.models.user import User
 from src.db.models.role import Role
+from src.db.models.user_agent import UserAgent
 from src.db.models.authentication_history import AuthenticationHistory
 from src.db.models.oauth import OAuthAccount
+from src.db.models.login_stats import DailyLoginStats, HourlyLoginStats
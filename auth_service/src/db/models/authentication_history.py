@@ -1,6 +1,15 @@
 import uuid
 
-from sqlalchemy import Column, String, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -11,9 +20,11 @@ from src.utils.mixins import TimestampMixin
 class AuthenticationHistory(Base, TimestampMixin):
     __tablename__ = "authentication_histories"
     __table_args__ = (
-        UniqueConstraint("id", "user_id"),
+        UniqueConstraint("id", "user_id", "created_at"),
         {
             "comment": "История аутентификации пользователей",
+            # хеш-секции делятся на помесячные секции по created_at,
+            # см. src/commands/auth_history_cli.py
             "postgresql_partition_by": "HASH (user_id)",
         },
     )
@@ -30,8 +41,16 @@ class AuthenticationHistory(Base, TimestampMixin):
         nullable=False,
         comment="Флаг, указывающий, был ли вход успешным (True) или нет (False)",
     )
-    user_agent = Column(
-        String, comment="Информация о браузере и операционной системе пользователя"
+    user_agent_id = Column(
+        Integer,
+        ForeignKey("user_agents.id"),
+        comment="Браузер и операционная система пользователя из справочника user_agents",
+    )
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата создания записи",
     )
 
     user_id = Column(
@@ -42,3 +61,19 @@ class AuthenticationHistory(Base, TimestampMixin):
         comment="Идентификатор пользователя, связанного с этой записью о входе",
     )
     user = relationship("User", back_populates="authentication_histories")
+
+
+Index(
+    "ix_authentication_histories_user_id_created_at_id",
+    AuthenticationHistory.user_id,
+    AuthenticationHistory.created_at.desc(),
+    AuthenticationHistory.id.desc(),
+)
+
+# BRIN занимает несколько страниц и подходит для выборок по диапазону времени,
+# так как записи добавляются в порядке created_at
+Index(
+    "ix_authentication_histories_created_at_brin",
+    AuthenticationHistory.created_at,
+    postgresql_using="brin",
+)
@@ -0,0 +1,42 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.db.postgres import Base
+
+
+class DailyLoginStats(Base):
+    """Число входов пользователя за сутки (UTC), обновляется при записи истории"""
+
+    __tablename__ = "daily_login_stats"
+    __table_args__ = {"comment": "Суточная статистика входов пользователей"}
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Идентификатор пользователя",
+    )
+    day = Column(Date, primary_key=True, comment="Сутки по UTC")
+    successes = Column(
+        BigInteger, nullable=False, default=0, comment="Число успешных входов"
+    )
+    failures = Column(
+        BigInteger, nullable=False, default=0, comment="Число неудачных входов"
+    )
+
+
+class HourlyLoginStats(Base):
+    """Число входов всех пользователей за час, обновляется при записи истории"""
+
+    __tablename__ = "hourly_login_stats"
+    __table_args__ = {"comment": "Почасовая статистика входов всех пользователей"}
+
+    hour = Column(
+        DateTime(timezone=True), primary_key=True, comment="Начало часа по UTC"
+    )
+    successes = Column(
+        BigInteger, nullable=False, default=0, comment="Число успешных входов"
+    )
+    failures = Column(
+        BigInteger, nullable=False, default=0, comment="Число неудачных входов"
+    )
@@ -3,7 +3,6 @@ import uuid
 from sqlalchemy import Column, String, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from src.db.postgres import Base
 from src.utils.mixins import TimestampMixin
@@ -52,15 +51,13 @@ class User(Base, TimestampMixin):
     def __init__(
         self, login: str, email: str, password: str, first_name: str, last_name: str
     ) -> None:
+        """password - уже вычисленный хеш пароля"""
+
         self.login = login
         self.email = email
-        self.password = self.password = generate_password_hash(password)
+        self.password = password
         self.first_name = first_name
         self.last_name = last_name
 
-    def check_password(self, password: str) -> bool:
-        passwords_are_identical = self.password == password
-        return passwords_are_identical or check_password_hash(self.password, password)
-
     def __repr__(self) -> str:
         return f"<User {self.login}>"
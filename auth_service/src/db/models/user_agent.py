@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String
+
+from src.db.postgres import Base
+
+
+class UserAgent(Base):
+    """
+    Справочник строк User-Agent.
+    История аутентификаций хранит ссылку на строку справочника,
+    а не саму строку, которая повторяется в каждой записи
+    """
+
+    __tablename__ = "user_agents"
+    __table_args__ = {"comment": "Справочник браузеров и операционных систем"}
+
+    id = Column(Integer, primary_key=True, comment="Идентификатор строки User-Agent")
+    hash = Column(
+        String(64),
+        unique=True,
+        nullable=False,
+        comment="SHA-256 строки User-Agent для поиска",
+    )
+    user_agent = Column(String, nullable=False, comment="Строка User-Agent")
+    browser = Column(String(50), comment="Браузер")
+    os = Column(String(50), comment="Операционная система")
+    device = Column(String(20), nullable=False, comment="Тип устройства")
@@ -0,0 +1,137 @@
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.config import settings
+
+
+class PoolMetrics:
+    """
+    Метрики пула соединений одного движка: время получения соединения,
+    таймауты ожидания и время жизни закрытых соединений.
+    Занятые и переполняющие соединения берутся у текущего пула движка,
+    так как engine.dispose() заменяет пул новым
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.checkouts = 0
+        self.checkout_total_ms = 0.0
+        self.checkout_max_ms = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.lifetime_total_seconds = 0.0
+        self.lifetime_max_seconds = 0.0
+
+    def observe_checkout(self, elapsed_ms: float) -> None:
+        self.checkouts += 1
+        self.checkout_total_ms += elapsed_ms
+        self.checkout_max_ms = max(self.checkout_max_ms, elapsed_ms)
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        lifetime = time.time() - connection_record.starttime
+        self.closes += 1
+        self.lifetime_total_seconds += lifetime
+        self.lifetime_max_seconds = max(self.lifetime_max_seconds, lifetime)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        pool = self.engine.sync_engine.pool
+
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "checkout_mean_ms": (
+                round(self.checkout_total_ms / self.checkouts, 3) if self.checkouts else 0.0
+            ),
+            "checkout_max_ms": round(self.checkout_max_ms, 3),
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+            "lifetime_mean_seconds": (
+                round(self.lifetime_total_seconds / self.closes, 3) if self.closes else 0.0
+            ),
+            "lifetime_max_seconds": round(self.lifetime_max_seconds, 3),
+        }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий время получения соединения, включая ожидание и pre-ping"""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.observe_checkout((time.perf_counter() - started_at) * 1000)
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options() -> dict[str, Any]:
+    """
+    Параметры пула и asyncpg для create_async_engine.
+
+    За PgBouncer в режиме transaction соседние транзакции могут попасть
+    в разные серверные соединения, поэтому кэши подготовленных запросов
+    выключаются, а имена запросов делаются уникальными
+    """
+
+    if settings.db_pgbouncer:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        connect_args = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def instrument_pool(name: str, engine: AsyncEngine) -> None:
+    """Подключение метрик к пулу движка, слушатели переходят в пул после dispose()"""
+
+    metrics = PoolMetrics(engine)
+    pool = engine.sync_engine.pool
+    pool.metrics = metrics
+    event.listen(pool, "connect", metrics.on_connect)
+    event.listen(pool, "close", metrics.on_close)
+    event.listen(pool, "invalidate", metrics.on_invalidate)
+    pool_metrics[name] = metrics
@@ -3,12 +3,16 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
 
 from src.core.config import settings
+from src.db.instrumentation import query_instrumentation
+from src.db.pool import engine_options, instrument_pool
 
 Base = declarative_base()
 
 dsn = f"postgresql+asyncpg://{settings.db_dsn}"
 
-engine = create_async_engine(dsn, echo=settings.echo, future=True)
+engine = create_async_engine(dsn, echo=settings.echo, future=True, **engine_options())
+instrument_pool("primary", engine)
+query_instrumentation.attach(engine.sync_engine)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
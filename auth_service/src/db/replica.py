@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.instrumentation import query_instrumentation
+from src.db.pool import engine_options, instrument_pool
+from src.db.postgres import async_session
+
+READ_YOUR_WRITES_COOKIE = "primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# реплика, применившая весь полученный WAL, не отстает, даже если
+# последняя транзакция была давно; не реплика (копия БД) отставания не имеет
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+replica_engine = (
+    create_async_engine(
+        f"postgresql+asyncpg://{settings.db_replica_dsn}",
+        echo=settings.echo,
+        **engine_options(),
+    )
+    if settings.db_replica_dsn
+    else None
+)
+if replica_engine:
+    query_instrumentation.attach(replica_engine.sync_engine)
+    instrument_pool("replica", replica_engine)
+replica_session = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine
+    else None
+)
+
+
+class ReplicaRouter:
+    """
+    Выбор между основной БД и репликой для маршрутов, которые только читают.
+
+    Фоновая задача раз в check_interval_seconds измеряет отставание
+    реплики, чтения идут на реплику, только пока оно не больше
+    max_lag_seconds. Ошибка измерения выключает реплику до следующей
+    проверки. Клиент, недавно менявший данные, читает из основной БД
+    (read-your-writes), пока не истечет cookie READ_YOUR_WRITES_COOKIE
+    """
+
+    def __init__(self, max_lag_seconds: float, check_interval_seconds: float) -> None:
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag: float | None = None
+        self._task: asyncio.Task | None = None
+        self.replica_sessions = 0
+        self.primary_sessions = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return replica_session is not None
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.lag is not None and self.lag <= self.max_lag_seconds
+
+    async def check(self) -> None:
+        """Измерение отставания реплики"""
+
+        try:
+            async with replica_session() as db:
+                lag = await db.scalar(REPLICA_LAG_QUERY)
+            self.lag = float(lag) if lag is not None else None
+        except Exception as exc:
+            self.lag = None
+            auth_logger.error(f"Ошибка при проверке отставания реплики: {exc}")
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval_seconds)
+
+    @staticmethod
+    def mark_write(response: Response) -> None:
+        """Чтения клиента после изменения данных идут в основную БД"""
+
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(time.time() + settings.read_your_writes_seconds),
+            max_age=settings.read_your_writes_seconds,
+            httponly=True,
+        )
+
+    @staticmethod
+    def wrote_recently(request: Request) -> bool:
+        try:
+            return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def session_factory(self, request: Request) -> async_sessionmaker:
+        if not self.enabled or self.wrote_recently(request):
+            self.primary_sessions += 1
+            return async_session
+
+        if not self.available:
+            self.fallbacks += 1
+            self.primary_sessions += 1
+            return async_session
+
+        self.replica_sessions += 1
+        return replica_session
+
+    def start(self) -> None:
+        if self.enabled:
+            self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if replica_engine:
+            await replica_engine.dispose()
+
+    def stats(self) -> dict[str, int | float | bool | None]:
+        return {
+            "enabled": self.enabled,
+            "lag_seconds": self.lag,
+            "replica_sessions": self.replica_sessions,
+            "primary_sessions": self.primary_sessions,
+            "fallbacks": self.fallbacks,
+        }
+
+
+replica_router = ReplicaRouter(
+    settings.db_replica_max_lag_seconds, settings.db_replica_check_interval_seconds
+)
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """Сессия для маршрутов, которые только читают: реплика или основная БД"""
+
+    async with replica_router.session_factory(request)() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
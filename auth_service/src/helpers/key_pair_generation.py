@@ -1,15 +1,25 @@
+import sys
+
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+from src.utils.token_algorithms import get_token_algorithm
 
-def generate_private_and_public_keys():
-    """Key pair generation (private and public)"""
 
-    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+def serialize_key_pair(private_key) -> tuple[bytes, bytes]:
+    """PEM serialization of private key and its public key"""
+
+    # RSA keys keep the PKCS#1 format used in existing .env files,
+    # EC and Ed25519 keys can only be serialized as PKCS#8
+    private_format = (
+        serialization.PrivateFormat.TraditionalOpenSSL
+        if isinstance(private_key, rsa.RSAPrivateKey)
+        else serialization.PrivateFormat.PKCS8
+    )
 
     pem_private_key = private_key.private_bytes(
         encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        format=private_format,
         encryption_algorithm=serialization.NoEncryption(),
     )
 
@@ -18,6 +28,15 @@ def generate_private_and_public_keys():
         format=serialization.PublicFormat.SubjectPublicKeyInfo,
     )
 
+    return pem_private_key, pem_public_key
+
+
+def generate_private_and_public_keys(algorithm_name: str = "RS256"):
+    """Key pair generation (private and public)"""
+
+    private_key = get_token_algorithm(algorithm_name).generate_private_key()
+    pem_private_key, pem_public_key = serialize_key_pair(private_key)
+
     print("-------------------------------")
     print(f"PRIVATE KEY: {pem_private_key}")
     print("-------------------------------")
@@ -28,4 +47,4 @@ def generate_private_and_public_keys():
 
 
 if __name__ == "__main__":
-    generate_private_and_public_keys()
+    generate_private_and_public_keys(*sys.argv[1:2])
@@ -0,0 +1,80 @@
+import time
+from typing import Annotated
+
+import jwt
+import typer
+
+from src.utils.token_algorithms import TOKEN_ALGORITHMS, TokenAlgorithm
+
+
+def make_login_payloads(now: int) -> tuple[dict, dict]:
+    """Payloads of the same shape as issued on login"""
+
+    access_token_payload = {
+        "iss": "Auth service",
+        "user_login": "benchmark_user",
+        "user_role": "general",
+        "type": "access",
+        "exp": now + 15 * 60,
+        "iat": now,
+    }
+    refresh_token_payload = {
+        **access_token_payload,
+        "type": "refresh",
+        "exp": now + 10 * 24 * 60 * 60,
+    }
+
+    return access_token_payload, refresh_token_payload
+
+
+def benchmark_algorithm(algorithm: TokenAlgorithm, iterations: int) -> dict:
+    """Measures login signing (two tokens) and access token verification"""
+
+    private_key = algorithm.generate_private_key()
+    public_key = private_key.public_key()
+    headers = {"alg": algorithm.name, "typ": "JWT", "kid": "benchmark"}
+    access_token_payload, refresh_token_payload = make_login_payloads(
+        int(time.time())
+    )
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        access_token = jwt.encode(
+            access_token_payload, private_key, algorithm.name, headers=headers
+        )
+        jwt.encode(refresh_token_payload, private_key, algorithm.name, headers=headers)
+    sign_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        jwt.decode(access_token, public_key, algorithms=[algorithm.name])
+    verify_seconds = time.perf_counter() - started_at
+
+    return {
+        "logins_per_second": iterations / sign_seconds,
+        "verifications_per_second": iterations / verify_seconds,
+        "token_length": len(access_token),
+    }
+
+
+def run_benchmark(
+    iterations: Annotated[int, typer.Option(help="Logins per algorithm")] = 1000,
+):
+    """
+    Compares JWT algorithms on the login path:
+    signing of access + refresh token and verification of access token
+    """
+
+    typer.echo(f"{'algorithm':<10}{'logins/s':>12}{'verify/s':>12}{'token len':>11}")
+    for algorithm in TOKEN_ALGORITHMS.values():
+        result = benchmark_algorithm(algorithm, iterations)
+        typer.echo(
+            f"{algorithm.name:<10}"
+            f"{result['logins_per_second']:>12.0f}"
+            f"{result['verifications_per_second']:>12.0f}"
+            f"{result['token_length']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(run_benchmark)
@@ -1,18 +1,23 @@
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, Request, status
 from fastapi.responses import ORJSONResponse
-from fastapi_pagination import add_pagination
 from redis.asyncio import Redis
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import JSONResponse
 
-from src.api.v1 import auth_history, healthcheck, login, role, user
+from src.api.v1 import auth_history, healthcheck, login, metrics, role, user
 from src.core.config import settings
 from src.core.jaeger import configure_tracer
 from src.db import cache
-from src.utils.check_request_limit import check_request_limit
+from src.db.postgres import async_session
+from src.db.replica import SAFE_METHODS, replica_router
+from src.utils.history_writer import auth_history_writer
+from src.utils.key_ring import key_ring
+from src.utils.password_hashing import password_hasher
+from src.utils.rate_limiter import check_request_limit, rate_limiter
+from src.utils.revocation import revocation_list
+from src.utils.role_catalog import role_catalog
 
 
 @asynccontextmanager
@@ -20,7 +25,22 @@ async def lifespan(app: FastAPI):
     cache.redis = Redis(
         host=settings.redis_host, port=settings.redis_port, decode_responses=True
     )
+    key_ring.start()
+    revocation_list.start()
+    rate_limiter.start()
+    role_catalog.start()
+    async with async_session() as db:
+        await role_catalog.load(db)
+    auth_history_writer.start()
+    replica_router.start()
     yield
+    await replica_router.stop()
+    await auth_history_writer.stop()
+    await role_catalog.stop()
+    await rate_limiter.stop()
+    await revocation_list.stop()
+    await key_ring.stop()
+    password_hasher.shutdown()
     await cache.redis.close()
 
 
@@ -43,18 +63,38 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-add_pagination(app)
-
 
 @app.middleware("http")
 async def check_request_limit_middleware(request: Request, call_next):
-    try:
-        await check_request_limit(request)
-    except HTTPException:
-        return JSONResponse(content={"message": "Слишком много запросов от данного пользователя"})
+    rate_limit = await check_request_limit(request)
+    if rate_limit is None:
+        return await call_next(request)
+
+    if not rate_limit.allowed:
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"message": "Слишком много запросов от данного пользователя"},
+            headers=rate_limit.headers,
+        )
+
+    response = await call_next(request)
+    response.headers.update(rate_limit.headers)
+    return response
+
+
+@app.middleware("http")
+async def read_your_writes_middleware(request: Request, call_next):
     response = await call_next(request)
+    if (
+        replica_router.enabled
+        and request.method not in SAFE_METHODS
+        and response.status_code < 400
+    ):
+        replica_router.mark_write(response)
+
     return response
 
+
 @app.middleware("http")
 async def before_request(request: Request, call_next):
 
@@ -75,6 +115,7 @@ app.include_router(role.router, prefix="/auth/api/v1/role")
 app.include_router(login.router, prefix="/auth/api/v1/login")
 app.include_router(auth_history.router, prefix="/auth/api/v1/auth-history")
 app.include_router(healthcheck.router, prefix="/auth/api/v1/healthcheck")
+app.include_router(metrics.router, prefix="/auth/api/v1/metrics")
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
@@ -1,12 +1,61 @@
-from datetime import datetime
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import select, insert
-from fastapi_pagination import Page
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
 
 from src.db import models
 from src.repositories.base import BaseRepository
-from src.schemas.auth_history import AuthHistoryInDB
+from src.schemas.auth_history import (
+    AuthHistoryInDB,
+    AuthHistoryPage,
+    DailyLoginCounts,
+    DailyLoginReport,
+    HourlyLoginCounts,
+    HourlyLoginReport,
+)
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.user_agent import parse_user_agent, user_agent_cache, user_agent_hash
+
+if TYPE_CHECKING:
+    from src.utils.history_writer import AuthHistoryEvent
+
+
+def failure_ratio(successes: int, failures: int) -> float:
+    total = successes + failures
+
+    return failures / total if total else 0.0
+
+
+def upsert_login_counts(model, key_columns: list[str], counts: Counter) -> Insert:
+    """
+    Прибавление счетчиков входов к строкам статистики.
+    Строки идут в порядке ключа, чтобы параллельные записи из разных
+    воркеров блокировали их в одном порядке и не попадали в deadlock
+    """
+
+    keys = sorted({item[:-1] for item in counts})
+    query = pg_insert(model).values(
+        [
+            dict(
+                zip(key_columns, item),
+                successes=counts[(*item, True)],
+                failures=counts[(*item, False)],
+            )
+            for item in keys
+        ]
+    )
+
+    return query.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            "successes": model.successes + query.excluded.successes,
+            "failures": model.failures + query.excluded.failures,
+        },
+    )
 
 
 class AuthHistoryRepository(BaseRepository):
@@ -17,25 +66,237 @@ class AuthHistoryRepository(BaseRepository):
     async def get_history(
         self,
         user_id: UUID,
-    ) -> Page[AuthHistoryInDB]:
-        """Получение истории аутентификаций"""
-
-        query = select(self.model).where(self.model.user_id == user_id)
-        result = await self.db.execute(query)
-
-        return result.scalars().all()
-
-    async def set_history(self, login: str, user_agent: str, success: bool):
-        query = select(models.User).where(models.User.login == login)
-        users = await self.db.execute(query)
-        user = users.first()
-        if user:
-            query = insert(self.model).values(
-                user_id=user[0].id,
-                success=success,
-                user_agent=user_agent,
-                created_at=datetime.now(),
-            )
-            result = await self.db.execute(query)
+        limit: int,
+        before: str | None = None,
+        after: str | None = None,
+    ) -> AuthHistoryPage:
+        """
+        Страница истории аутентификаций, от новых записей к старым.
+        Пагинация по ключу (created_at, id): before - записи старше курсора,
+        after - новее курсора. Стоимость страницы не зависит от длины истории
+        """
+
+        sort_key = tuple_(self.model.created_at, self.model.id)
+        query = (
+            select(self.model, models.UserAgent)
+            .outerjoin(
+                models.UserAgent, models.UserAgent.id == self.model.user_agent_id
+            )
+            .where(self.model.user_id == user_id)
+        )
+        if after:
+            query = query.where(sort_key > tuple_(*decode_cursor(after))).order_by(
+                self.model.created_at.asc(), self.model.id.asc()
+            )
+        else:
+            if before:
+                query = query.where(sort_key < tuple_(*decode_cursor(before)))
+            query = query.order_by(self.model.created_at.desc(), self.model.id.desc())
+
+        result = await self.db.execute(query.limit(limit + 1))
+        items = [
+            AuthHistoryInDB(
+                id=history.id,
+                success=history.success,
+                created_at=history.created_at,
+                **(
+                    {
+                        "user_agent": user_agent.user_agent,
+                        "browser": user_agent.browser,
+                        "os": user_agent.os,
+                        "device": user_agent.device,
+                    }
+                    if user_agent
+                    else {}
+                ),
+            )
+            for history, user_agent in result.all()
+        ]
+        has_more = len(items) > limit
+        items = items[:limit]
+        if after:
+            items.reverse()
+
+        has_older = has_more if not after else True
+        has_newer = has_more if after else bool(before)
+
+        return AuthHistoryPage(
+            items=items,
+            limit=limit,
+            next_cursor=(
+                encode_cursor(items[-1].created_at, items[-1].id)
+                if items and has_older
+                else None
+            ),
+            prev_cursor=(
+                encode_cursor(items[0].created_at, items[0].id)
+                if items and has_newer
+                else None
+            ),
+        )
+
+    async def add_history_batch(self, events: list["AuthHistoryEvent"]) -> int:
+        """
+        Запись пачки событий одним многострочным INSERT.
+        Логины переводятся в id пользователей одним запросом,
+        события несуществующих пользователей пропускаются.
+        Строки User-Agent заменяются ссылками на справочник user_agents.
+        В той же транзакции обновляется суточная и почасовая статистика входов
+        """
+
+        logins = {event.login for event in events}
+        users = await self.db.execute(
+            select(models.User.login, models.User.id).where(
+                models.User.login.in_(logins)
+            )
+        )
+        user_ids = dict(users.all())
+        events = [event for event in events if event.login in user_ids]
+
+        hashes = {
+            event.user_agent: user_agent_hash(event.user_agent)
+            for event in events
+            if event.user_agent
+        }
+        user_agent_ids = await self.get_user_agent_ids(hashes)
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_ids[event.login],
+                "success": event.success,
+                "user_agent_id": (
+                    user_agent_ids[hashes[event.user_agent]]
+                    if event.user_agent
+                    else None
+                ),
+                "created_at": event.created_at,
+            }
+            for event in events
+        ]
+        if rows:
+            await self.db.execute(insert(self.model).values(rows))
+
+            daily, hourly = Counter(), Counter()
+            for row in rows:
+                created_at = row["created_at"].astimezone(timezone.utc)
+                daily[(row["user_id"], created_at.date(), row["success"])] += 1
+                hourly[
+                    (created_at.replace(minute=0, second=0, microsecond=0), row["success"])
+                ] += 1
+            await self.db.execute(
+                upsert_login_counts(models.DailyLoginStats, ["user_id", "day"], daily)
+            )
+            await self.db.execute(
+                upsert_login_counts(models.HourlyLoginStats, ["hour"], hourly)
+            )
             await self.db.commit()
-            return result
+
+            # в кэш попадают только закоммиченные строки справочника
+            for key, user_agent_id in user_agent_ids.items():
+                user_agent_cache.set(key, user_agent_id)
+
+        return len(rows)
+
+    async def get_user_agent_ids(self, hashes: dict[str, str]) -> dict[str, int]:
+        """
+        Идентификаторы строк User-Agent в справочнике по их хешам.
+        Известные строки берутся из LRU-кэша, новые добавляются в справочник
+        """
+
+        user_agent_ids, missing = {}, {}
+        for user_agent, key in hashes.items():
+            user_agent_id = user_agent_cache.get(key)
+            if user_agent_id is None:
+                missing[key] = user_agent
+            else:
+                user_agent_ids[key] = user_agent_id
+
+        if missing:
+            rows = []
+            # в порядке ключа, как и статистика, чтобы воркеры не попадали в deadlock
+            for key in sorted(missing):
+                parsed = parse_user_agent(missing[key])
+                rows.append(
+                    {
+                        "hash": key,
+                        "user_agent": missing[key],
+                        "browser": parsed.browser,
+                        "os": parsed.os,
+                        "device": parsed.device,
+                    }
+                )
+            await self.db.execute(
+                pg_insert(models.UserAgent)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["hash"])
+            )
+            result = await self.db.execute(
+                select(models.UserAgent.hash, models.UserAgent.id).where(
+                    models.UserAgent.hash.in_(missing)
+                )
+            )
+            user_agent_ids.update(result.all())
+
+        return user_agent_ids
+
+    async def get_daily_stats(self, user_id: UUID, days: int) -> DailyLoginReport:
+        """Входы пользователя по суткам за последние days суток, от новых к старым"""
+
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        stats = await self.db.scalars(
+            select(models.DailyLoginStats)
+            .where(
+                models.DailyLoginStats.user_id == user_id,
+                models.DailyLoginStats.day >= since,
+            )
+            .order_by(models.DailyLoginStats.day.desc())
+        )
+        items = [
+            DailyLoginCounts(
+                day=item.day,
+                successes=item.successes,
+                failures=item.failures,
+                failure_ratio=failure_ratio(item.successes, item.failures),
+            )
+            for item in stats
+        ]
+        successes = sum(item.successes for item in items)
+        failures = sum(item.failures for item in items)
+
+        return DailyLoginReport(
+            items=items,
+            successes=successes,
+            failures=failures,
+            failure_ratio=failure_ratio(successes, failures),
+        )
+
+    async def get_hourly_stats(self, hours: int) -> HourlyLoginReport:
+        """Входы всех пользователей по часам за последние hours часов, от новых к старым"""
+
+        since = datetime.now(timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        ) - timedelta(hours=hours - 1)
+        stats = await self.db.scalars(
+            select(models.HourlyLoginStats)
+            .where(models.HourlyLoginStats.hour >= since)
+            .order_by(models.HourlyLoginStats.hour.desc())
+        )
+        items = [
+            HourlyLoginCounts(
+                hour=item.hour,
+                successes=item.successes,
+                failures=item.failures,
+                failure_ratio=failure_ratio(item.successes, item.failures),
+            )
+            for item in stats
+        ]
+        successes = sum(item.successes for item in items)
+        failures = sum(item.failures for item in items)
+
+        return HourlyLoginReport(
+            items=items,
+            successes=successes,
+            failures=failures,
+            failure_ratio=failure_ratio(successes, failures),
+        )
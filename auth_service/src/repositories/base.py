@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.logger import auth_logger
 from src.db.postgres import get_session
+from src.db.replica import get_read_session
 from src.db import models
 
 
@@ -21,6 +22,12 @@ class BaseRepository:
 
         self.db = db
 
+    @classmethod
+    def read_only(cls, db: AsyncSession = Depends(get_read_session)):
+        """Репозиторий для маршрутов, которые только читают и могут идти в реплику"""
+
+        return cls(db)
+
     async def get(self, table: Any) -> list[Any]:
         """Базовая функция по получению всех сущностей в БД"""
 
@@ -9,6 +9,7 @@ from src.db import models
 from src.db.models import Role
 from src.repositories.base import BaseRepository
 from src.schemas.role import RoleGeneral
+from src.utils.role_catalog import role_catalog
 
 
 class RoleRepository(BaseRepository):
@@ -17,9 +18,16 @@ class RoleRepository(BaseRepository):
     model = models.Role
 
     async def get_roles(self) -> list[RoleGeneral]:
-        """Получение всех ролей"""
+        """Получение всех ролей из каталога ролей"""
 
-        return await self.get(self.model)
+        return await role_catalog.get_roles(self.db)
+
+    async def get_roles_etag(self) -> str:
+        """ETag текущего списка ролей"""
+
+        await role_catalog.ensure_loaded(self.db)
+
+        return role_catalog.etag
 
     async def create_role(self, role_name: str) -> RoleGeneral:
         """Создание роли"""
@@ -34,6 +42,7 @@ class RoleRepository(BaseRepository):
             )
 
         created_role = await self.create(Role(name=role_name))
+        await role_catalog.invalidate()
 
         return created_role
 
@@ -51,6 +60,7 @@ class RoleRepository(BaseRepository):
 
         role_to_update.name = new_role_name
         updated_role = await self.update(role_to_update)
+        await role_catalog.invalidate()
 
         return updated_role
 
@@ -67,13 +77,9 @@ class RoleRepository(BaseRepository):
             )
 
         await self.delete(role_to_delete)
+        await role_catalog.invalidate()
 
-    async def role_id_by_name(self, role: str) -> UUID:
-        """Получение id роли по названию роли"""
-
-        query = select(self.model.id).where(self.model.name == role)
-
-        result = await self.db.execute(query)
-        role_id = result.scalars().first()
+    async def role_id_by_name(self, role: str) -> UUID | None:
+        """Получение id роли по названию роли из каталога ролей"""
 
-        return role_id
+        return await role_catalog.get_id(self.db, role)
@@ -1,15 +1,18 @@
 from http import HTTPStatus
-from typing import Any
+from typing import AsyncIterator
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.orm import joinedload
 
 from src.db import models
 from src.db.models import Role, User
 from src.repositories.base import BaseRepository
-from src.schemas.user import UserInDB, UserInDBWRole
+from src.schemas.user import BulkUserFilter, UserInDB, UserInDBWRole
+from src.utils.password_hashing import password_hasher
+from src.utils.role_catalog import role_catalog
 
 
 class UserRepository(BaseRepository):
@@ -46,6 +49,69 @@ class UserRepository(BaseRepository):
 
         return updated_user
 
+    async def bulk_update_user_role(
+        self,
+        role_id: UUID | None,
+        chunk_size: int,
+        logins: list[str] | None = None,
+        ids: list[UUID] | None = None,
+        user_filter: BulkUserFilter | None = None,
+    ) -> AsyncIterator[list[str]]:
+        """
+        Смена роли у группы пользователей пачками по chunk_size.
+        Каждая пачка - один UPDATE с отдельным коммитом, чтобы строки
+        не оставались заблокированными до конца всей операции.
+        Возвращает логины пользователей, у которых роль изменилась
+        """
+
+        if user_filter is None:
+            if logins is not None:
+                column, values, array_type = self.model.login, logins, ARRAY(String)
+            else:
+                column, values, array_type = self.model.id, ids, ARRAY(PG_UUID(as_uuid=True))
+
+            for start in range(0, len(values), chunk_size):
+                chunk = bindparam("chunk", values[start:start + chunk_size], type_=array_type)
+                yield await self.update_role_where(role_id, column == any_(chunk))
+            return
+
+        conditions = []
+        if user_filter.role_id:
+            conditions.append(self.model.role_id == user_filter.role_id)
+        if user_filter.without_role:
+            conditions.append(self.model.role_id.is_(None))
+        if user_filter.created_after:
+            conditions.append(self.model.created_at >= user_filter.created_after)
+        if user_filter.created_before:
+            conditions.append(self.model.created_at < user_filter.created_before)
+
+        # обновленные строки перестают подходить под условие, поэтому
+        # каждая пачка берет следующих по id пользователей со старой ролью
+        while True:
+            chunk = (
+                select(self.model.id)
+                .where(*conditions, self.model.role_id.is_distinct_from(role_id))
+                .order_by(self.model.id)
+                .limit(chunk_size)
+            )
+            updated = await self.update_role_where(role_id, self.model.id.in_(chunk))
+            if not updated:
+                return
+            yield updated
+
+    async def update_role_where(self, role_id: UUID | None, condition) -> list[str]:
+        result = await self.db.execute(
+            update(self.model)
+            .where(condition, self.model.role_id.is_distinct_from(role_id))
+            .values(role_id=role_id)
+            .returning(self.model.login)
+            .execution_options(synchronize_session=False)
+        )
+        updated = list(result.scalars())
+        await self.db.commit()
+
+        return updated
+
     async def remove_user_role(self, login: str, role_id: str) -> None:
         """Удаление роли у пользователя"""
 
@@ -88,32 +154,35 @@ class UserRepository(BaseRepository):
 
         return user.role.name if user else None
 
-    async def check_login(self, login: str, password: str) -> Any:
-        """Проверка логина и пароля пользователя"""
+    async def check_login(self, login: str, password: str) -> tuple[User, str | None]:
+        """
+        Проверка логина и пароля пользователя.
+        Пользователь и название его роли читаются одним запросом
+        """
 
-        query = select(self.model).where(self.model.login == login)
+        query = (
+            select(self.model, Role.name)
+            .outerjoin(Role, self.model.role_id == Role.id)
+            .where(self.model.login == login)
+        )
         result = await self.db.execute(query)
-        user = result.scalar()
+        row = result.first()
+        user, role_name = row if row else (None, None)
 
-        if not (user and user.check_password(password)):
+        if not (user and await password_hasher.verify(user.password, password)):
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED, detail=f"Неверный логин или пароль"
             )
-        return user
 
-    async def role_name_by_id(self, role_id: UUID) -> str:
-        """Получение названия роли по id роли"""
+        return user, role_name
 
-        query = (
-            select(self.model)
-            .options(joinedload(self.model.role))
-            .where(self.model.role_id == role_id)
-        )
+    async def role_name_by_id(self, role_id: UUID | None) -> str | None:
+        """Получение названия роли по id роли из каталога ролей"""
 
-        result = await self.db.execute(query)
-        user = result.scalars().first()
+        if role_id is None:
+            return None
 
-        return user.role.name if user else None
+        return await role_catalog.get_name(self.db, role_id)
 
     async def get_user_by_id(self, user_id: str) -> UserInDB:
         """
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 
 
@@ -8,8 +8,40 @@ from src.schemas.model_config import BaseOrjsonModel
 class AuthHistoryInDB(BaseOrjsonModel):
     id: UUID
     success: bool
-    user_agent: str
+    user_agent: str | None = None
+    browser: str | None = None
+    os: str | None = None
+    device: str | None = None
     created_at: datetime
 
     class Config:
         orm_mode = True
+
+
+class AuthHistoryPage(BaseOrjsonModel):
+    items: list[AuthHistoryInDB]
+    limit: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+class LoginCounts(BaseOrjsonModel):
+    successes: int
+    failures: int
+    failure_ratio: float
+
+
+class DailyLoginCounts(LoginCounts):
+    day: date
+
+
+class HourlyLoginCounts(LoginCounts):
+    hour: datetime
+
+
+class DailyLoginReport(LoginCounts):
+    items: list[DailyLoginCounts]
+
+
+class HourlyLoginReport(LoginCounts):
+    items: list[HourlyLoginCounts]
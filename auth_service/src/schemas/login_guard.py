@@ -0,0 +1,8 @@
+from src.schemas.model_config import BaseOrjsonModel
+
+
+class LockoutInDB(BaseOrjsonModel):
+    key: str
+    failures: int
+    locked: bool
+    retry_after: int
@@ -0,0 +1,9 @@
+from src.schemas.model_config import BaseOrjsonModel
+
+
+class SessionInDB(BaseOrjsonModel):
+    session_id: str
+    user_agent: str | None = None
+    created_at: int
+    expires_at: int
+    current: bool = False
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from src.schemas.model_config import BaseOrjsonModel
@@ -35,3 +36,23 @@ class Login(BaseOrjsonModel):
 class PasswordChange(BaseOrjsonModel):
     new_login: str | None = None
     new_password: str | None = None
+
+
+class BulkUserFilter(BaseOrjsonModel):
+    role_id: UUID | None = None
+    without_role: bool = False
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+class BulkRoleAssignment(BaseOrjsonModel):
+    role_id: UUID | None
+    logins: list[str] | None = None
+    ids: list[UUID] | None = None
+    filter: BulkUserFilter | None = None
+
+
+class BulkRoleAssignmentResult(BaseOrjsonModel):
+    role_id: UUID | None
+    updated: int
+    chunks: list[int]
@@ -3,25 +3,54 @@ from uuid import UUID
 from fastapi import Depends
 
 from src.repositories.auth_history import AuthHistoryRepository
-from src.schemas.auth_history import AuthHistoryInDB
+from src.schemas.auth_history import (
+    AuthHistoryPage,
+    DailyLoginReport,
+    HourlyLoginReport,
+)
+from src.utils.history_writer import AuthHistoryEvent, auth_history_writer
 
 
 class AuthHistoryService:
     """Сервис для взаимодействия с моделью AuthenticationHistory"""
 
-    def __init__(
-        self,
-        repository: AuthHistoryRepository = Depends(),
-    ):
+    def __init__(self, repository: AuthHistoryRepository = Depends(AuthHistoryRepository)):
         self.repository = repository
 
+    @classmethod
+    def read_only(
+        cls,
+        repository: AuthHistoryRepository = Depends(AuthHistoryRepository.read_only),
+    ) -> "AuthHistoryService":
+        """Сервис для маршрутов, которые только читают историю и могут идти в реплику"""
+
+        return cls(repository)
+
     async def get_history(
         self,
         user_id: UUID,
-    ) -> list[AuthHistoryInDB]:
-        """Получение истории аутентификаций"""
+        limit: int,
+        before: str | None = None,
+        after: str | None = None,
+    ) -> AuthHistoryPage:
+        """Получение страницы истории аутентификаций"""
+
+        return await self.repository.get_history(user_id, limit, before, after)
+
+    async def set_history(self, login: str, user_agent: str, success: bool) -> None:
+        """
+        Запись попытки входа.
+        Событие пишется в БД фоновой задачей, вход ее не ждет
+        """
+
+        auth_history_writer.add(AuthHistoryEvent(login, user_agent, success))
+
+    async def get_daily_stats(self, user_id: UUID, days: int) -> DailyLoginReport:
+        """Статистика входов пользователя по суткам"""
+
+        return await self.repository.get_daily_stats(user_id, days)
 
-        return await self.repository.get_history(user_id)
+    async def get_hourly_stats(self, hours: int) -> HourlyLoginReport:
+        """Статистика входов всех пользователей по часам"""
 
-    async def set_history(self, login: str, user_agent: str, success: bool):
-        return await self.repository.set_history(login, user_agent, success)
+        return await self.repository.get_hourly_stats(hours)
@@ -0,0 +1,142 @@
+import math
+from http import HTTPStatus
+
+from fastapi import Depends, HTTPException
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.cache import get_redis
+from src.schemas.login_guard import LockoutInDB
+
+LOGIN_FAILURES_KEY_PREFIX = "login_failures"
+LOGIN_LOCKOUT_KEY_PREFIX = "login_lockout"
+
+
+class LoginGuardService:
+    """
+    Защита входа от перебора паролей.
+
+    Неудачные попытки входа считаются в Redis отдельно по логину и по
+    клиенту. После max_failures неудач подряд ключ блокируется, и каждая
+    следующая неудача удваивает срок блокировки (до max_lockout_seconds).
+    Проверка блокировки выполняется до чтения пользователя из БД и
+    вычисления хеша пароля
+    """
+
+    def __init__(self, cache: Redis = Depends(get_redis)):
+        self.cache = cache
+
+    @staticmethod
+    def login_key(user_login: str) -> str:
+        return f"login:{user_login}"
+
+    @staticmethod
+    def client_key(client: str) -> str:
+        return f"client:{client}"
+
+    @staticmethod
+    def max_failures(key: str) -> int:
+        if key.startswith("client:"):
+            return settings.login_guard_client_max_failures
+
+        return settings.login_guard_max_failures
+
+    @staticmethod
+    def lockout_ms(failures: int, max_failures: int) -> int:
+        """Срок блокировки после очередной неудачной попытки"""
+
+        if failures < max_failures:
+            return 0
+
+        lockout_seconds = settings.login_guard_base_lockout_seconds * 2 ** min(
+            failures - max_failures, 32
+        )
+
+        return min(lockout_seconds, settings.login_guard_max_lockout_seconds) * 1000
+
+    def guarded_keys(self, user_login: str, client: str | None) -> list[str]:
+        keys = [self.login_key(user_login)]
+        if client:
+            keys.append(self.client_key(client))
+
+        return keys
+
+    async def check(self, user_login: str, client: str | None = None) -> None:
+        """Отказ во входе, если логин или клиент заблокированы"""
+
+        keys = self.guarded_keys(user_login, client)
+        pipe = self.cache.pipeline(transaction=False)
+        for key in keys:
+            pipe.pttl(f"{LOGIN_LOCKOUT_KEY_PREFIX}:{key}")
+        try:
+            lockouts_ms = await pipe.execute()
+        except Exception as exc:
+            auth_logger.error(f"Ошибка при проверке блокировки входа: {exc}")
+            return
+
+        retry_after_ms = max(lockouts_ms)
+        if retry_after_ms > 0:
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail="Слишком много неудачных попыток входа. Попробуйте позже",
+                headers={"Retry-After": str(math.ceil(retry_after_ms / 1000))},
+            )
+
+    async def register_failure(self, user_login: str, client: str | None = None) -> None:
+        """Учет неудачной попытки входа"""
+
+        keys = self.guarded_keys(user_login, client)
+        pipe = self.cache.pipeline(transaction=True)
+        for key in keys:
+            pipe.incr(f"{LOGIN_FAILURES_KEY_PREFIX}:{key}")
+            pipe.expire(
+                f"{LOGIN_FAILURES_KEY_PREFIX}:{key}",
+                settings.login_guard_failure_window_seconds,
+            )
+        try:
+            results = await pipe.execute()
+
+            pipe = self.cache.pipeline(transaction=False)
+            for key, failures in zip(keys, results[::2]):
+                lockout_ms = self.lockout_ms(failures, self.max_failures(key))
+                if lockout_ms:
+                    auth_logger.warning(f"Вход для '{key}' заблокирован на {lockout_ms} мс")
+                    pipe.set(f"{LOGIN_LOCKOUT_KEY_PREFIX}:{key}", failures, px=lockout_ms)
+            await pipe.execute()
+        except Exception as exc:
+            # как и check(), при недоступном Redis вход не блокируется
+            auth_logger.error(f"Ошибка при учете неудачной попытки входа: {exc}")
+
+    async def register_success(self, user_login: str) -> None:
+        """
+        Сброс счетчика логина после успешного входа.
+        Счетчик клиента не сбрасывается, иначе подбор паролей к разным
+        логинам можно было бы чередовать со входом в свой аккаунт
+        """
+
+        await self.cache.delete(
+            f"{LOGIN_FAILURES_KEY_PREFIX}:{self.login_key(user_login)}"
+        )
+
+    async def get_lockout(self, key: str) -> LockoutInDB:
+        """Состояние блокировки логина или клиента"""
+
+        pipe = self.cache.pipeline(transaction=False)
+        pipe.get(f"{LOGIN_FAILURES_KEY_PREFIX}:{key}")
+        pipe.pttl(f"{LOGIN_LOCKOUT_KEY_PREFIX}:{key}")
+        failures, lockout_ms = await pipe.execute()
+
+        return LockoutInDB(
+            key=key,
+            failures=int(failures or 0),
+            locked=lockout_ms > 0,
+            retry_after=math.ceil(max(lockout_ms, 0) / 1000),
+        )
+
+    async def reset(self, key: str) -> None:
+        """Снятие блокировки администратором"""
+
+        await self.cache.delete(
+            f"{LOGIN_FAILURES_KEY_PREFIX}:{key}", f"{LOGIN_LOCKOUT_KEY_PREFIX}:{key}"
+        )
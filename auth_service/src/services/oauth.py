@@ -9,6 +9,7 @@ from src.repositories.role import RoleRepository
 from src.repositories.user import UserRepository
 from src.schemas.user import UserInDB
 from src.utils.general import make_random_string
+from src.utils.password_hashing import password_hasher
 
 
 class YandexOAuthService:
@@ -61,7 +62,7 @@ class YandexOAuthService:
             new_user = User(
                 login=user_data_from_provider.get("login"),
                 email=user_data_from_provider.get("login"),
-                password=make_random_string(),
+                password=await password_hasher.hash(make_random_string()),
                 first_name=user_data_from_provider.get("first_name"),
                 last_name=user_data_from_provider.get("last_name"),
             )
@@ -0,0 +1,91 @@
+import secrets
+import time
+from typing import Any
+
+import orjson
+from fastapi import Depends
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.cache import get_redis
+from src.services.session import hash_refresh_token
+
+REFRESH_TOKEN_KEY_PREFIX = "refresh_token"
+USED_REFRESH_TOKEN_KEY_PREFIX = "used_refresh_token"
+
+
+class OpaqueRefreshTokenService:
+    """
+    Непрозрачные рефреш токены.
+
+    Токен - случайная 256-битная строка, в Redis по ее хешу хранится
+    ссылка на сессию пользователя (логин и идентификатор устройства).
+    Использованный токен до окончания срока его жизни помнится отдельно:
+    повторное предъявление значит, что токен украден, и сессия,
+    к которой относится вся цепочка ее токенов, отзывается
+    """
+
+    def __init__(self, cache: Redis = Depends(get_redis)):
+        self.cache = cache
+
+    @staticmethod
+    def make_key(refresh_token: str) -> str:
+        """Ключ записи рефреш токена в Redis"""
+
+        return f"{REFRESH_TOKEN_KEY_PREFIX}:{hash_refresh_token(refresh_token)}"
+
+    @staticmethod
+    def make_used_key(refresh_token: str) -> str:
+        """Ключ отметки об использовании рефреш токена"""
+
+        return f"{USED_REFRESH_TOKEN_KEY_PREFIX}:{hash_refresh_token(refresh_token)}"
+
+    async def issue(self, user_login: str, session_id: str) -> str:
+        """Выпуск нового рефреш токена"""
+
+        refresh_token = secrets.token_urlsafe(32)
+        record = {
+            "user_login": user_login,
+            "session_id": session_id,
+            "issued_at": int(time.time()),
+        }
+
+        await self.cache.set(
+            self.make_key(refresh_token),
+            orjson.dumps(record),
+            ex=settings.cache_expire_in_seconds,
+        )
+
+        return refresh_token
+
+    async def consume(self, refresh_token: str) -> dict[str, Any] | None:
+        """
+        Получение записи рефреш токена с одновременным удалением,
+        повторно использовать токен нельзя
+        """
+
+        pipe = self.cache.pipeline(transaction=True)
+        pipe.pttl(self.make_key(refresh_token))
+        pipe.getdel(self.make_key(refresh_token))
+        try:
+            ttl_ms, record = await pipe.execute()
+            if record:
+                ttl_ms = ttl_ms if ttl_ms > 0 else settings.cache_expire_in_seconds * 1000
+                await self.cache.set(self.make_used_key(refresh_token), record, px=ttl_ms)
+        except Exception as exc:
+            auth_logger.error(f"Ошибка при получении рефреш токена из кеша: {exc}")
+            return None
+
+        return orjson.loads(record) if record else None
+
+    async def find_reused(self, refresh_token: str) -> dict[str, Any] | None:
+        """Запись уже использованного рефреш токена, если он предъявлен повторно"""
+
+        try:
+            record = await self.cache.get(self.make_used_key(refresh_token))
+        except Exception as exc:
+            auth_logger.error(f"Ошибка при проверке повторного рефреш токена: {exc}")
+            return None
+
+        return orjson.loads(record) if record else None
@@ -2,6 +2,7 @@ from fastapi import Depends
 
 from src.repositories.role import RoleRepository
 from src.schemas.role import RoleGeneral
+from src.services.session import SessionService
 
 
 class RoleService:
@@ -10,8 +11,10 @@ class RoleService:
     def __init__(
         self,
         repository: RoleRepository = Depends(RoleRepository),
+        sessions: SessionService = Depends(SessionService),
     ):
         self.repository = repository
+        self.sessions = sessions
 
     async def get_all_roles(self) -> list[RoleGeneral]:
         """Получение всех ролей, заведенных в сервисе"""
@@ -20,6 +23,11 @@ class RoleService:
 
         return all_roles
 
+    async def get_roles_etag(self) -> str:
+        """ETag списка ролей для условных запросов"""
+
+        return await self.repository.get_roles_etag()
+
     async def create_role(self, role_name: str) -> RoleGeneral:
         """Создание новой роли"""
 
@@ -31,6 +39,7 @@ class RoleService:
         """Изменение роли"""
 
         updated_role = await self.repository.update_role(old_role_name, new_role_name)
+        await self.sessions.bump_roles_version()
 
         return updated_role
 
@@ -38,3 +47,4 @@ class RoleService:
         """Удаление роли"""
 
         await self.repository.remove_role(role_name)
+        await self.sessions.bump_roles_version()
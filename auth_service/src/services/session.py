@@ -0,0 +1,272 @@
+import hashlib
+import time
+from typing import Any
+
+import orjson
+from fastapi import Depends
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.db.cache import get_redis
+from src.utils.jwt import ACCESS_TOKEN_LIFETIME
+from src.utils.revocation import revocation_list
+
+SESSIONS_KEY_PREFIX = "sessions"
+TOKEN_VERSION_KEY_PREFIX = "token_version"
+ROLE_VERSION_KEY_PREFIX = "role_version"
+ROLES_VERSION_KEY = "roles_version"
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """Хеш рефреш токена, сам токен в Redis не хранится"""
+
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+class SessionService:
+    """
+    Хранилище сессий пользователей в Redis.
+
+    Для каждого пользователя заводится один хеш, в котором на каждое
+    устройство хранится запись с хешем рефреш токена, идентификатором
+    последнего access токена, ролью и версиями:
+    - token_version - счетчик пользователя, его увеличение
+      разом отзывает все сессии ("выйти со всех устройств");
+    - role_version - счетчик пользователя, меняется при смене его роли;
+    - roles_version - общий счетчик, меняется при изменении ролей.
+    Пока версии совпадают, роль при обновлении токенов берется из Redis
+    """
+
+    def __init__(self, cache: Redis = Depends(get_redis)):
+        self.cache = cache
+
+    @staticmethod
+    def sessions_key(user_login: str) -> str:
+        return f"{SESSIONS_KEY_PREFIX}:{user_login}"
+
+    @staticmethod
+    def token_version_key(user_login: str) -> str:
+        return f"{TOKEN_VERSION_KEY_PREFIX}:{user_login}"
+
+    @staticmethod
+    def role_version_key(user_login: str) -> str:
+        return f"{ROLE_VERSION_KEY_PREFIX}:{user_login}"
+
+    def versions_keys(self, user_login: str) -> tuple[str, str, str]:
+        return (
+            self.token_version_key(user_login),
+            self.role_version_key(user_login),
+            ROLES_VERSION_KEY,
+        )
+
+    @staticmethod
+    def parse_versions(
+        token_version: str | None, role_version: str | None, roles_version: str | None
+    ) -> dict[str, int]:
+        return {
+            "token_version": int(token_version or 0),
+            "role_version": int(role_version or 0),
+            "roles_version": int(roles_version or 0),
+        }
+
+    async def get_versions(self, user_login: str) -> dict[str, int]:
+        """Текущие версии токенов и роли пользователя"""
+
+        versions = await self.cache.mget(*self.versions_keys(user_login))
+
+        return self.parse_versions(*versions)
+
+    async def get_session_state(
+        self, user_login: str, session_id: str | None
+    ) -> tuple[dict[str, Any] | None, dict[str, int]]:
+        """Запись сессии и текущие версии за один запрос к Redis"""
+
+        pipe = self.cache.pipeline(transaction=False)
+        pipe.hget(self.sessions_key(user_login), session_id or "")
+        pipe.mget(*self.versions_keys(user_login))
+        session, versions = await pipe.execute()
+
+        return (
+            orjson.loads(session) if session else None,
+            self.parse_versions(*versions),
+        )
+
+    async def save_session(
+        self,
+        user_login: str,
+        session_id: str,
+        refresh_token: str,
+        access_token_id: str,
+        user_role: str,
+        versions: dict[str, int],
+        user_agent: str | None = None,
+        created_at: int | None = None,
+    ) -> None:
+        """
+        Сохранение сессии устройства пользователя.
+        Версии должны быть прочитаны до чтения роли из БД.
+
+        Истекшие и отозванные записи удаляются при каждом сохранении, поэтому
+        хеш не копит сессии давно забытых устройств, а его срок жизни,
+        продлеваемый до срока новой сессии, не продлевает чужие записи
+        """
+
+        now = int(time.time())
+        session = {
+            "session_id": session_id,
+            "refresh_token_hash": hash_refresh_token(refresh_token),
+            "access_token_id": access_token_id,
+            "access_token_expires_at": now + int(
+                ACCESS_TOKEN_LIFETIME.total_seconds()
+            ),
+            "user_role": user_role,
+            "user_agent": user_agent,
+            "created_at": created_at or now,
+            "expires_at": now + settings.cache_expire_in_seconds,
+            **versions,
+        }
+
+        sessions_key = self.sessions_key(user_login)
+        pipe = self.cache.pipeline(transaction=False)
+        pipe.hgetall(sessions_key)
+        pipe.mget(*self.versions_keys(user_login))
+        sessions, current_versions = await pipe.execute()
+        _, stale_session_ids = self.split_sessions(
+            sessions, self.parse_versions(*current_versions)
+        )
+
+        pipe = self.cache.pipeline(transaction=False)
+        if stale_session_ids:
+            pipe.hdel(sessions_key, *stale_session_ids)
+        pipe.hset(sessions_key, session_id, orjson.dumps(session))
+        pipe.expire(sessions_key, settings.cache_expire_in_seconds)
+        await pipe.execute()
+
+    @staticmethod
+    def is_session_active(
+        session: dict[str, Any] | None, versions: dict[str, int]
+    ) -> bool:
+        """Сессия не истекла и не отозвана"""
+
+        return bool(
+            session
+            and session["expires_at"] > time.time()
+            and session["token_version"] == versions["token_version"]
+        )
+
+    def is_refresh_token_valid(
+        self,
+        session: dict[str, Any] | None,
+        refresh_token: str,
+        versions: dict[str, int],
+    ) -> bool:
+        """Рефреш токен принадлежит активной сессии"""
+
+        return self.is_session_active(session, versions) and (
+            session["refresh_token_hash"] == hash_refresh_token(refresh_token)
+        )
+
+    @staticmethod
+    def cached_role(
+        session: dict[str, Any] | None, versions: dict[str, int]
+    ) -> str | None:
+        """Роль из сессии, если она не устарела"""
+
+        if not session:
+            return None
+
+        if (
+            session.get("role_version") != versions["role_version"]
+            or session.get("roles_version") != versions["roles_version"]
+        ):
+            return None
+
+        return session.get("user_role")
+
+    def split_sessions(
+        self, sessions: dict[str, str], versions: dict[str, int]
+    ) -> tuple[list[dict[str, Any]], list[str]]:
+        """Активные сессии и идентификаторы истекших и отозванных"""
+
+        active_sessions, stale_session_ids = [], []
+        for session_id, session in sessions.items():
+            session = orjson.loads(session)
+            if self.is_session_active(session, versions):
+                active_sessions.append(session)
+            else:
+                stale_session_ids.append(session_id)
+
+        return active_sessions, stale_session_ids
+
+    async def list_sessions(self, user_login: str) -> list[dict[str, Any]]:
+        """Активные сессии пользователя, неактивные попутно удаляются"""
+
+        pipe = self.cache.pipeline(transaction=False)
+        pipe.hgetall(self.sessions_key(user_login))
+        pipe.mget(*self.versions_keys(user_login))
+        sessions, versions = await pipe.execute()
+        active_sessions, stale_session_ids = self.split_sessions(
+            sessions, self.parse_versions(*versions)
+        )
+
+        if stale_session_ids:
+            await self.cache.hdel(self.sessions_key(user_login), *stale_session_ids)
+
+        return sorted(active_sessions, key=lambda session: session["created_at"])
+
+    @staticmethod
+    async def revoke_access_tokens(sessions: list[str | None]) -> None:
+        """Отзыв access токенов, выданных в рамках сессий"""
+
+        sessions = [orjson.loads(session) for session in sessions if session]
+        await revocation_list.revoke_many(
+            [
+                (session["access_token_id"], session["access_token_expires_at"])
+                for session in sessions
+                if session.get("access_token_id")
+            ]
+        )
+
+    async def revoke_session(self, user_login: str, session_id: str) -> bool:
+        """Отзыв сессии одного устройства вместе с ее access токеном"""
+
+        pipe = self.cache.pipeline(transaction=True)
+        pipe.hget(self.sessions_key(user_login), session_id)
+        pipe.hdel(self.sessions_key(user_login), session_id)
+        session, _ = await pipe.execute()
+
+        await self.revoke_access_tokens([session])
+
+        return session is not None
+
+    async def revoke_all_sessions(self, user_login: str) -> None:
+        """
+        Отзыв всех сессий пользователя.
+        Достаточно увеличить token_version, хеш удаляется для экономии памяти
+        """
+
+        pipe = self.cache.pipeline(transaction=True)
+        pipe.hvals(self.sessions_key(user_login))
+        pipe.incr(self.token_version_key(user_login))
+        pipe.delete(self.sessions_key(user_login))
+        sessions, _, _ = await pipe.execute()
+
+        await self.revoke_access_tokens(sessions)
+
+    async def bump_role_version(self, user_login: str) -> None:
+        """Роль пользователя изменилась"""
+
+        await self.cache.incr(self.role_version_key(user_login))
+
+    async def bump_role_versions(self, user_logins: list[str]) -> None:
+        """Роль изменилась у группы пользователей"""
+
+        async with self.cache.pipeline(transaction=False) as pipe:
+            for user_login in user_logins:
+                pipe.incr(self.role_version_key(user_login))
+            await pipe.execute()
+
+    async def bump_roles_version(self) -> None:
+        """Изменился справочник ролей"""
+
+        await self.cache.incr(ROLES_VERSION_KEY)
@@ -1,20 +1,37 @@
+import uuid
 from http import HTTPStatus
 
 from fastapi import Depends, Response, HTTPException
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
-from werkzeug.security import generate_password_hash
 
 from src.core.config import settings
 from src.core.logger import auth_logger
-from src.db.cache import AsyncCacheService
 from src.db.models import User
 from src.db.postgres import get_session
 from src.repositories.role import RoleRepository
-from src.schemas.user import UserCreate, UserInDB, UserInDBWRole, Login
+from src.schemas.user import (
+    BulkRoleAssignment,
+    BulkRoleAssignmentResult,
+    Login,
+    UserCreate,
+    UserInDB,
+    UserInDBWRole,
+)
 from src.repositories.user import UserRepository
-from src.utils.jwt import validate_token, create_access_and_refresh_tokens
+from src.services.login_guard import LoginGuardService
+from src.services.refresh_token import OpaqueRefreshTokenService
+from src.services.session import SessionService
+from src.utils.jwt import (
+    create_access_and_refresh_tokens,
+    create_access_token,
+    get_unverified_claims,
+    validate_token,
+)
+from src.utils.password_hashing import password_hasher
+from src.schemas.login_guard import LockoutInDB
+from src.schemas.session import SessionInDB
 from src.schemas.user import PasswordChange
 
 
@@ -25,18 +42,25 @@ class UserService:
         self,
         db: AsyncSession = Depends(get_session),
         repository: UserRepository = Depends(),
-        cache: AsyncCacheService = Depends(AsyncCacheService),
         role_repository: RoleRepository = Depends(RoleRepository),
+        refresh_tokens: OpaqueRefreshTokenService = Depends(
+            OpaqueRefreshTokenService
+        ),
+        sessions: SessionService = Depends(SessionService),
+        login_guard: LoginGuardService = Depends(LoginGuardService),
     ):
         self.repository = repository
         self.db = db
-        self.cache = cache
         self.role_repository = role_repository
+        self.refresh_tokens = refresh_tokens
+        self.sessions = sessions
+        self.login_guard = login_guard
 
     async def register(self, user_create: UserCreate) -> UserInDB:
         """Регистрация пользователя"""
 
         user_dto = jsonable_encoder(user_create)
+        user_dto["password"] = await password_hasher.hash(user_dto["password"])
         user = User(**user_dto)
         role_id = await self.role_repository.role_id_by_name(settings.default_user_role)
         user.role_id = role_id
@@ -45,42 +69,181 @@ class UserService:
     async def change_user_role(self, login: str, role_id: str) -> UserInDBWRole:
         """Изменение роли пользователя"""
 
-        return await self.repository.update_user_role(login, role_id)
+        updated_user = await self.repository.update_user_role(login, role_id)
+        await self.sessions.bump_role_version(login)
+
+        return updated_user
+
+    async def bulk_change_user_role(
+        self, assignment: BulkRoleAssignment
+    ) -> BulkRoleAssignmentResult:
+        """
+        Смена роли у группы пользователей, заданной логинами, id или фильтром.
+        Версии ролей пользователей увеличиваются после каждой пачки,
+        чтобы их токены и сессии получили новую роль
+        """
+
+        selectors = [
+            selector
+            for selector in (assignment.logins, assignment.ids, assignment.filter)
+            if selector is not None
+        ]
+        if len(selectors) != 1:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="Нужно передать ровно одно из полей logins, ids или filter",
+            )
+        if assignment.filter and not assignment.filter.model_dump(exclude_defaults=True):
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="Фильтр пользователей не может быть пустым",
+            )
+        if assignment.role_id and not await self.repository.role_name_by_id(
+            assignment.role_id
+        ):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=f"Роли с id '{assignment.role_id}' не существует",
+            )
+
+        chunks = []
+        async for logins in self.repository.bulk_update_user_role(
+            assignment.role_id,
+            settings.bulk_role_chunk_size,
+            logins=assignment.logins,
+            ids=assignment.ids,
+            user_filter=assignment.filter,
+        ):
+            await self.sessions.bump_role_versions(logins)
+            chunks.append(len(logins))
+
+        auth_logger.info(
+            f"Роль '{assignment.role_id}' назначена {sum(chunks)} пользователям "
+            f"за {len(chunks)} пачек"
+        )
+
+        return BulkRoleAssignmentResult(
+            role_id=assignment.role_id, updated=sum(chunks), chunks=chunks
+        )
 
     async def remove_user_role(self, login: str, role_id: str) -> None:
         """Удаление роли у пользователя"""
 
-        return await self.repository.remove_user_role(login, role_id)
+        await self.repository.remove_user_role(login, role_id)
+        await self.sessions.bump_role_version(login)
 
     async def refresh_token(
         self, refresh_token: str, response: Response
-    ) -> JSONResponse:
-        """Обновление токенов по рефреш токену"""
-
-        decoded_refresh_token = await validate_token(refresh_token)
-
-        user_login = decoded_refresh_token.get("user_login")
-        user_role = await self.repository.get_role_by_login(user_login)
-
-        if await self.cache.get_data_by_key(user_login) != refresh_token:
+    ) -> dict:
+        """
+        Обновление токенов по рефреш токену.
+        Сначала проверяется Redis, в БД идем только за устаревшей ролью
+        """
+
+        if settings.refresh_token_mode == "opaque":
+            record = await self.refresh_tokens.consume(refresh_token)
+            if not record:
+                reused = await self.refresh_tokens.find_reused(refresh_token)
+                if reused:
+                    await self.sessions.revoke_session(
+                        reused["user_login"], reused["session_id"]
+                    )
+                    auth_logger.warning(
+                        f"Повторное использование рефреш токена, "
+                        f"сессия {reused['session_id']} отозвана"
+                    )
+                raise HTTPException(
+                    status_code=HTTPStatus.UNAUTHORIZED,
+                    detail="Рефреш токен не найден или уже использован",
+                )
+            user_login, session_id = record["user_login"], record["session_id"]
+        else:
+            unverified_refresh_token = await get_unverified_claims(refresh_token)
+            user_login = unverified_refresh_token.get("user_login")
+            session_id = unverified_refresh_token.get("sid")
+
+        session, versions = await self.sessions.get_session_state(
+            user_login, session_id
+        )
+        if not self.sessions.is_refresh_token_valid(session, refresh_token, versions):
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="У пользователя не совпадает рефреш токен из редиса и из cookies",
             )
 
-        await self.update_all_token(user_login, user_role, response)
+        if settings.refresh_token_mode == "jwt":
+            await validate_token(refresh_token)
+
+        user_role = await self.get_actual_role(user_login, session, versions)
+        await self.update_all_token(user_login, user_role, response, versions, session)
+
+        # cookies новых токенов установлены в response, поэтому возвращается
+        # не отдельный JSONResponse, а тело ответа
+        return {"message": "Токен обновлен"}
+
+    async def get_actual_role(
+        self, user_login: str, session: dict | None, versions: dict[str, int]
+    ) -> str | None:
+        """Роль из сессии в Redis, а если она устарела - из БД"""
+
+        user_role = self.sessions.cached_role(session, versions)
+        if user_role is None:
+            user_role = await self.repository.get_role_by_login(user_login)
 
-        return JSONResponse(content={"message": "Токен обновлен"})
+        return user_role
 
-    async def login(self, response: Response, data: Login):
-        """Аутентификация пользователя"""
+    async def login(
+        self,
+        response: Response,
+        data: Login,
+        user_agent: str | None = None,
+        client: str | None = None,
+    ):
+        """
+        Аутентификация пользователя.
+        Заблокированные логин и клиент отсекаются до проверки пароля
+        """
 
         user = jsonable_encoder(data)
         user = Login(**user)
-        user_db = await self.repository.check_login(user.user_login, user.password)
+        await self.login_guard.check(user.user_login, client)
+
+        versions = await self.sessions.get_versions(user.user_login)
+        try:
+            user_db, role = await self.repository.check_login(
+                user.user_login, user.password
+            )
+        except HTTPException as exc:
+            # 503 от перегруженного пула хеширования - не неудачный вход
+            if exc.status_code == HTTPStatus.UNAUTHORIZED:
+                await self.login_guard.register_failure(user.user_login, client)
+            raise
+        await self.login_guard.register_success(user.user_login)
+
+        if password_hasher.needs_rehash(user_db.password):
+            user_db.password = await password_hasher.hash(user.password)
+            await self.repository.update(user_db)
+            auth_logger.info("Хеш пароля пересчитан по текущей политике")
+
+        await self.update_all_token(
+            user.user_login, role, response, versions, user_agent=user_agent
+        )
+        return user_db
+
+    async def oauth_login(
+        self, response: Response, user_db: User, user_agent: str | None = None
+    ) -> User:
+        """
+        Вход пользователя, подтвержденного провайдером OAuth.
+        Пароль при этом не проверяется
+        """
+
+        versions = await self.sessions.get_versions(user_db.login)
         role = await self.repository.role_name_by_id(user_db.role_id)
 
-        await self.update_all_token(user.user_login, role, response)
+        await self.update_all_token(
+            user_db.login, role, response, versions, user_agent=user_agent
+        )
         return user_db
 
     async def change_password(
@@ -91,14 +254,14 @@ class UserService:
         user = jsonable_encoder(password_data)
         user = Login(**user)
 
-        user_to_update = await self.repository.check_login(
+        user_to_update, _ = await self.repository.check_login(
             user.user_login, user.password
         )
         new_login_data = jsonable_encoder(password_change_data)
         new_login_data = PasswordChange(**new_login_data)
 
         if new_login_data.new_password:
-            user_to_update.password = generate_password_hash(
+            user_to_update.password = await password_hasher.hash(
                 new_login_data.new_password
             )
         if new_login_data.new_login:
@@ -106,32 +269,119 @@ class UserService:
 
         await self.repository.update(user_to_update)
 
+        await self.sessions.revoke_all_sessions(user.user_login)
+
+        versions = await self.sessions.get_versions(user_to_update.login)
         role = await self.repository.role_name_by_id(user_to_update.role_id)
 
-        await self.update_all_token(user_to_update.login, role, response)
+        await self.update_all_token(user_to_update.login, role, response, versions)
 
         auth_logger.info("Пароль и логин успешно обновлены")
 
         return JSONResponse(content={"message": "Пароль и логин успешно обновлены"})
 
     async def update_all_token(
-        self, user_login: str, role: str, response: Response
+        self,
+        user_login: str,
+        role: str,
+        response: Response,
+        versions: dict[str, int],
+        session: dict | None = None,
+        user_agent: str | None = None,
     ) -> None:
-        """Обновление токенов"""
+        """
+        Обновление токенов.
+        Без переданной сессии создается новая сессия устройства
+        """
+
+        if session:
+            session_id = session["session_id"]
+            user_agent = session["user_agent"]
+            created_at = session["created_at"]
+        else:
+            session_id, created_at = uuid.uuid4().hex, None
+
+        access_token_id = uuid.uuid4().hex
+        if settings.refresh_token_mode == "opaque":
+            access_token = await create_access_token(
+                user_login, role, session_id, access_token_id
+            )
+            refresh_token = await self.refresh_tokens.issue(user_login, session_id)
+        else:
+            access_token, refresh_token = await create_access_and_refresh_tokens(
+                user_login, role, session_id, access_token_id
+            )
 
-        access_token, refresh_token = await create_access_and_refresh_tokens(
-            user_login, role
+        await self.sessions.save_session(
+            user_login,
+            session_id,
+            refresh_token,
+            access_token_id,
+            role,
+            versions,
+            user_agent=user_agent,
+            created_at=created_at,
         )
 
         response.set_cookie("access_token", access_token)
         response.set_cookie("refresh_token", refresh_token)
 
-        await self.cache.create_or_update_record(user_login, refresh_token)
-
         auth_logger.info("Токены обновлены")
 
-    async def logout(self, login, refresh_token: str, response: Response):
-        await self.cache.delete_record(login)
-        await self.cache.create_or_update_record("black_list", refresh_token)
+    async def logout(self, refresh_token: str, response: Response):
+        """Выход пользователя с текущего устройства"""
+
+        if settings.refresh_token_mode == "opaque":
+            record = await self.refresh_tokens.consume(refresh_token)
+            if record:
+                await self.sessions.revoke_session(
+                    record["user_login"], record["session_id"]
+                )
+        else:
+            decoded_refresh_token = await validate_token(refresh_token)
+            await self.sessions.revoke_session(
+                decoded_refresh_token.get("user_login"),
+                decoded_refresh_token.get("sid", ""),
+            )
+        response.delete_cookie("access_token")
+        response.delete_cookie("refresh_token")
+
+    async def get_lockout(self, key: str) -> LockoutInDB:
+        """Состояние блокировки входа"""
+
+        return await self.login_guard.get_lockout(key)
+
+    async def reset_lockout(self, key: str) -> None:
+        """Снятие блокировки входа"""
+
+        await self.login_guard.reset(key)
+
+    async def get_sessions(
+        self, user_login: str, current_session_id: str | None
+    ) -> list[SessionInDB]:
+        """Активные сессии пользователя"""
+
+        sessions = await self.sessions.list_sessions(user_login)
+
+        return [
+            SessionInDB(
+                **session, current=session["session_id"] == current_session_id
+            )
+            for session in sessions
+        ]
+
+    async def revoke_session(self, user_login: str, session_id: str) -> None:
+        """Завершение сессии на одном устройстве"""
+
+        if not await self.sessions.revoke_session(user_login, session_id):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=f"Сессии с id '{session_id}' не существует",
+            )
+
+    async def revoke_all_sessions(self, user_login: str, response: Response) -> None:
+        """Выход пользователя со всех устройств"""
+
+        await self.sessions.revoke_all_sessions(user_login)
         response.delete_cookie("access_token")
         response.delete_cookie("refresh_token")
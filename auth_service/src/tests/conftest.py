@@ -1,5 +1,7 @@
 import asyncio
 import datetime
+import hashlib
+import json
 from typing import Any
 from urllib.parse import urljoin
 
@@ -217,6 +219,7 @@ async def refresh_token_unknown_role():
         "iss": "Auth service",
         "user_login": "test_login",
         "user_role": "unknown_role",
+        "sid": "test_session",
         "type": "refresh",
         "exp": exp_refresh_token,
         "iat": iat,
@@ -232,7 +235,19 @@ async def refresh_token_unknown_role():
     redis = Redis.from_url(
         f"redis://{test_settings.redis.redis_host}:{test_settings.redis.redis_port}",
     )
-    await redis.set("test_login", encoded_refresh_token, ex=864000)
+    session = {
+        "session_id": "test_session",
+        "refresh_token_hash": hashlib.sha256(encoded_refresh_token.encode()).hexdigest(),
+        "user_role": "unknown_role",
+        "user_agent": None,
+        "created_at": iat,
+        "expires_at": exp_refresh_token,
+        "token_version": 0,
+        "role_version": 0,
+        "roles_version": 0,
+    }
+    await redis.hset("sessions:test_login", "test_session", json.dumps(session))
+    await redis.expire("sessions:test_login", 864000)
     return encoded_refresh_token
 
 
@@ -41,6 +41,8 @@ async def test_refresh_token_200(refresh_token_unknown_role, client_session):
 
         assert raw_response.status == HTTPStatus.OK
         assert response["message"] == "Токен обновлен"
+        assert "access_token" in raw_response.cookies
+        assert "refresh_token" in raw_response.cookies
 
 
 async def test_register_200(make_post_request, delete_row_from_table):
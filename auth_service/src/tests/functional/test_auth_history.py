@@ -1,7 +1,11 @@
+import asyncio
+import random
+import uuid
 from http import HTTPStatus
 from urllib.parse import urljoin
 
 import pytest
+from werkzeug.security import generate_password_hash
 
 from settings import test_settings
 from test_data.user import registration_data
@@ -12,6 +16,11 @@ AUTH_HISTORY_URL = urljoin(test_settings.auth_api_url, AUTH_HISTORY_ENDPOINT)
 USER_ENDPOINT = "auth/api/v1/user"
 USER_URL = urljoin(test_settings.auth_api_url, USER_ENDPOINT)
 
+LOGIN_ENDPOINT = "auth/api/v1/login"
+
+METRICS_ENDPOINT = "auth/api/v1/metrics/"
+METRICS_URL = urljoin(test_settings.auth_api_url, METRICS_ENDPOINT)
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -57,14 +66,12 @@ async def test_all_auth_histories_success_200(
         {
             "id": "1ed4dd3b-6235-4920-ab23-d51bafb5cbb2",
             "success": True,
-            "user_agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0",
             "user_id": registration_response["id"],
             "created_at": "2024-06-08 19:56:07.125360 +00:00",
         },
         {
             "id": "97ac142b-8148-477b-811b-985340bc669e",
             "success": True,
-            "user_agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0",
             "user_id": registration_response["id"],
             "created_at": "2024-06-08 20:56:07.125360 +00:00",
         },
@@ -80,6 +87,30 @@ async def test_all_auth_histories_success_200(
 
         assert raw_response.status == HTTPStatus.OK
         assert len(response["items"]) == 2
+        assert response["items"][0]["id"] == "97ac142b-8148-477b-811b-985340bc669e"
+        assert response["next_cursor"] is None
+
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{registration_response["id"]}",
+        headers=headers,
+        params={"limit": 1},
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert len(response["items"]) == 1
+        assert response["prev_cursor"] is None
+
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{registration_response["id"]}",
+        headers=headers,
+        params={"limit": 1, "before": response["next_cursor"]},
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["items"][0]["id"] == "1ed4dd3b-6235-4920-ab23-d51bafb5cbb2"
+        assert response["next_cursor"] is None
 
     await delete_row_from_table(
         "authentication_histories", "1ed4dd3b-6235-4920-ab23-d51bafb5cbb2"
@@ -89,3 +120,194 @@ async def test_all_auth_histories_success_200(
     )
 
     await delete_row_from_table("users", registration_response["id"])
+
+
+async def test_daily_login_stats_success_200(
+    access_token_admin,
+    add_user_to_table,
+    client_session,
+    delete_row_from_table,
+    make_post_request,
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+    status, _ = await make_post_request(
+        LOGIN_ENDPOINT, data={"user_login": login, "password": "WrongPassword"}
+    )
+    assert status == HTTPStatus.UNAUTHORIZED
+    status, _ = await make_post_request(
+        LOGIN_ENDPOINT, data={"user_login": login, "password": "Password"}
+    )
+    assert status == HTTPStatus.OK
+
+    # история и статистика пишутся фоновой задачей
+    await asyncio.sleep(1.5)
+
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{id}/stats",
+        headers={"X-Request-Id": "test"},
+        params={"days": 1},
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["successes"] == 1
+        assert response["failures"] == 1
+        assert response["failure_ratio"] == 0.5
+        assert len(response["items"]) == 1
+
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{id}",
+        headers={"X-Request-Id": "test"},
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["items"][0]["user_agent"] is not None
+        assert response["items"][0]["device"] is not None
+
+    await delete_row_from_table("authentication_histories", id, "user_id")
+    await delete_row_from_table("users", id)
+
+
+async def get_replica_router_stats(client_session, headers: dict) -> dict:
+    async with client_session.get(METRICS_URL, headers=headers) as raw_response:
+        assert raw_response.status == HTTPStatus.OK
+
+        return (await raw_response.json())["replica_router"]
+
+
+async def read_empty_auth_history(client_session, headers: dict, id: uuid.UUID) -> None:
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{id}", headers=headers
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["items"] == []
+
+
+async def test_auth_history_read_without_replica_uses_primary_200(
+    access_token_admin,
+    add_user_to_table,
+    client_session,
+    delete_row_from_table,
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    before = await get_replica_router_stats(client_session, headers)
+    if before["enabled"]:
+        pytest.skip("Сервис запущен с DB_REPLICA_DSN")
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+    await read_empty_auth_history(client_session, headers, id)
+    after = await get_replica_router_stats(client_session, headers)
+
+    assert after["primary_sessions"] > before["primary_sessions"]
+    assert after["replica_sessions"] == before["replica_sessions"]
+
+    await delete_row_from_table("users", id)
+
+
+async def test_auth_history_read_with_healthy_replica_uses_replica_200(
+    access_token_admin,
+    add_user_to_table,
+    client_session,
+    delete_row_from_table,
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+
+    # cookie read-your-writes от прежних тестов направил бы чтение в основную БД
+    client_session.cookie_jar.clear()
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+
+    before = await get_replica_router_stats(client_session, headers)
+    if not before["enabled"]:
+        pytest.skip("Сервис запущен без DB_REPLICA_DSN")
+    if (
+        before["lag_seconds"] is None
+        or before["lag_seconds"] > test_settings.postgres.db_replica_max_lag_seconds
+    ):
+        pytest.skip("Реплика недоступна или отстает")
+
+    await read_empty_auth_history(client_session, headers, id)
+    after = await get_replica_router_stats(client_session, headers)
+
+    assert after["replica_sessions"] > before["replica_sessions"]
+    assert after["primary_sessions"] == before["primary_sessions"]
+    assert after["fallbacks"] == before["fallbacks"]
+
+    await delete_row_from_table("users", id)
+
+
+async def test_auth_history_read_after_write_uses_primary_200(
+    access_token_admin,
+    add_user_to_table,
+    client_session,
+    delete_row_from_table,
+    make_post_request,
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+
+    client_session.cookie_jar.clear()
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    before = await get_replica_router_stats(client_session, headers)
+    if not before["enabled"]:
+        pytest.skip("Сервис запущен без DB_REPLICA_DSN")
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+    status, _ = await make_post_request(
+        LOGIN_ENDPOINT, data={"user_login": login, "password": "Password"}
+    )
+    assert status == HTTPStatus.OK
+
+    cookies = {cookie.key: cookie.value for cookie in client_session.cookie_jar}
+    assert "primary_until" in cookies
+
+    # история пишется фоновой задачей
+    await asyncio.sleep(1.5)
+
+    # вход выдал access_token пользователя, запросы дальше идут от администратора
+    client_session.cookie_jar.clear()
+    client_session.cookie_jar.update_cookies(
+        {"access_token": access_token_admin, "primary_until": cookies["primary_until"]}
+    )
+    async with client_session.get(
+        f"{AUTH_HISTORY_URL}/{id}", headers=headers
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert len(response["items"]) == 1
+    after = await get_replica_router_stats(client_session, headers)
+
+    # чтение после изменения данных идет в основную БД,
+    # даже если реплика еще не получила запись
+    assert after["primary_sessions"] > before["primary_sessions"]
+    assert after["replica_sessions"] == before["replica_sessions"]
+
+    client_session.cookie_jar.clear()
+    await delete_row_from_table("authentication_histories", id, "user_id")
+    await delete_row_from_table("users", id)
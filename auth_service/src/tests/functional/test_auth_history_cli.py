@@ -0,0 +1,30 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parents[3]
+
+pytestmark = pytest.mark.asyncio
+
+
+async def run_auth_history_cli(*args: str) -> tuple[int, str]:
+    """Запуск команды обслуживания истории с .env сервиса"""
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "src.commands.auth_history_cli", *args,
+        cwd=SERVICE_DIR,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+
+    return process.returncode, output.decode()
+
+
+async def test_repartition_batch_uses_index():
+    returncode, output = await run_auth_history_cli("explain-copy", "--batch-size", "5000")
+
+    assert returncode == 0, output
+    assert "Пачка читается сканированием индекса" in output
@@ -0,0 +1,107 @@
+import asyncio
+import random
+import sys
+from http import HTTPStatus
+from pathlib import Path
+
+import asyncpg
+import orjson
+import pytest
+from werkzeug.security import generate_password_hash
+
+from settings import test_settings
+
+LOGIN_ENDPOINT = "auth/api/v1/login"
+SERVICE_DIR = Path(__file__).resolve().parents[3]
+
+pytestmark = pytest.mark.asyncio
+
+
+async def run_bulk_import(*args: str) -> tuple[int, str]:
+    """Запуск команды импорта с .env сервиса, как ее запускает администратор"""
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "src.commands.bulk_import", "bulk-import", *args,
+        cwd=SERVICE_DIR,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+
+    return process.returncode, output.decode()
+
+
+async def delete_users(*logins: str) -> None:
+    # история входа пишется фоновой задачей
+    await asyncio.sleep(1.5)
+    conn = await asyncpg.connect(dsn="postgresql://" + test_settings.postgres.db_dsn)
+    await conn.execute(
+        "DELETE FROM authentication_histories WHERE user_id IN "
+        "(SELECT id FROM users WHERE login = ANY($1))",
+        logins,
+    )
+    await conn.execute("DELETE FROM users WHERE login = ANY($1)", logins)
+    await conn.close()
+
+
+async def test_bulk_import_csv_rerun_skips_existing(
+    tmp_path, make_post_request
+):
+    prefix = "Import" + str(random.randint(1, 100000))
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "login,email,password,first_name,last_name\n"
+        f"{prefix}a,{prefix}a@example.com,Password,Anna,Ivanova\n"
+        f"{prefix}b,{prefix}b@example.com,Password,,\n"
+        f"{prefix}c,,Password,,\n"
+    )
+
+    returncode, output = await run_bulk_import(str(path), "--workers", "1")
+
+    assert returncode == 0, output
+    assert "добавлено 2, занято 0, некорректно 1" in output
+    assert not path.with_name(path.name + ".checkpoint").exists()
+
+    status, _ = await make_post_request(
+        LOGIN_ENDPOINT, data={"user_login": f"{prefix}a", "password": "Password"}
+    )
+    assert status == HTTPStatus.OK
+
+    returncode, output = await run_bulk_import(str(path), "--workers", "1")
+
+    assert returncode == 0, output
+    assert "добавлено 0, занято 2, некорректно 1" in output
+
+    await delete_users(f"{prefix}a", f"{prefix}b")
+
+
+async def test_bulk_import_ndjson_pre_hashed_rejects_unsupported_hashes(
+    tmp_path, make_post_request
+):
+    prefix = "Import" + str(random.randint(1, 100000))
+    path = tmp_path / "users.ndjson"
+    records = [
+        {
+            "login": f"{prefix}a",
+            "email": f"{prefix}a@example.com",
+            "password": generate_password_hash("Password", method="pbkdf2"),
+        },
+        {
+            "login": f"{prefix}b",
+            "email": f"{prefix}b@example.com",
+            "password": "$2b$12$R9h/cIPz0gi.URNNX3kh2OPST9/PgBkqquzi.Ss7KIUgO2t0jWMUW",
+        },
+    ]
+    path.write_bytes(b"\n".join(orjson.dumps(record) for record in records))
+
+    returncode, output = await run_bulk_import(str(path), "--pre-hashed")
+
+    assert returncode == 0, output
+    assert "добавлено 1, занято 0, некорректно 1" in output
+
+    status, _ = await make_post_request(
+        LOGIN_ENDPOINT, data={"user_login": f"{prefix}a", "password": "Password"}
+    )
+    assert status == HTTPStatus.OK
+
+    await delete_users(f"{prefix}a")
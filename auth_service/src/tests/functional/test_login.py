@@ -1,10 +1,13 @@
 import uuid
 import random
 from http import HTTPStatus
+from urllib.parse import urljoin
 
 import pytest
 from werkzeug.security import generate_password_hash
 
+from settings import test_settings
+
 LOGIN_ENDPOINT = "auth/api/v1/login"
 
 
@@ -49,3 +52,35 @@ async def test_user_login_with_wrong_user(
     assert status == HTTPStatus.UNAUTHORIZED
 
     await delete_row_from_table("users", id)
+
+
+@pytest.mark.asyncio
+async def test_user_login_locked_after_failures(
+    add_user_to_table, client_session, delete_row_from_table
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+    # свой адрес клиента, чтобы не зависеть от неудач в других тестах
+    headers = {
+        "X-Request-Id": "test",
+        "X-Forwarded-For": f"198.51.100.{random.randint(1, 254)}",
+    }
+    url = urljoin(test_settings.auth_api_url, LOGIN_ENDPOINT)
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+    for _ in range(5):
+        async with client_session.post(
+            url, json={"user_login": login, "password": "WrongPassword"}, headers=headers
+        ) as raw_response:
+            assert raw_response.status == HTTPStatus.UNAUTHORIZED
+
+    async with client_session.post(
+        url, json={"user_login": login, "password": "Password"}, headers=headers
+    ) as raw_response:
+        assert raw_response.status == HTTPStatus.TOO_MANY_REQUESTS
+        assert int(raw_response.headers["Retry-After"]) > 0
+
+    await delete_row_from_table("authentication_histories", id, "user_id")
+    await delete_row_from_table("users", id)
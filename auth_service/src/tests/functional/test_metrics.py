@@ -0,0 +1,61 @@
+from http import HTTPStatus
+from urllib.parse import urljoin
+
+import pytest
+
+from settings import test_settings
+
+METRICS_ENDPOINT = "auth/api/v1/metrics/"
+METRICS_URL = urljoin(test_settings.auth_api_url, METRICS_ENDPOINT)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_metrics_wo_access_401(client_session):
+    client_session.cookie_jar.clear()
+
+    async with client_session.get(
+        METRICS_URL, headers={"X-Request-Id": "test"}
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.UNAUTHORIZED
+        assert response["detail"] == "В cookies отсутствует access token"
+
+
+async def test_get_metrics_200(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+
+    async with client_session.get(
+        METRICS_URL, headers={"X-Request-Id": "test"}
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert "hits" in response["verified_token_cache"]
+        assert "misses" in response["verified_token_cache"]
+        assert "enabled" in response["replica_router"]
+        assert "primary_sessions" in response["replica_router"]
+        assert "sampled" in response["queries"]
+        assert "top" in response["queries"]
+        assert "checked_out" in response["pools"]["primary"]
+
+
+async def test_get_metrics_pool_settings_200(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+
+    async with client_session.get(
+        METRICS_URL, headers={"X-Request-Id": "test"}
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+
+    pool = response["pools"]["primary"]
+    postgres = test_settings.postgres
+
+    assert pool["size"] == postgres.db_pool_size
+    assert pool["overflow"] <= postgres.db_max_overflow
+    assert pool["checked_out"] <= postgres.db_pool_size + postgres.db_max_overflow
+    assert pool["checkouts"] > 0
+    assert "timeouts" in pool
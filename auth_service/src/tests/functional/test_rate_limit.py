@@ -0,0 +1,134 @@
+import asyncio
+import uuid
+from http import HTTPStatus
+from urllib.parse import urljoin
+
+import pytest
+from redis.asyncio import Redis
+
+from settings import test_settings
+
+HEALTHCHECK_ENDPOINT = "auth/api/v1/healthcheck/"
+HEALTHCHECK_URL = urljoin(test_settings.auth_api_url, HEALTHCHECK_ENDPOINT)
+
+METRICS_ENDPOINT = "auth/api/v1/metrics/"
+METRICS_URL = urljoin(test_settings.auth_api_url, METRICS_ENDPOINT)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def hit_until_limited(client_session, user_agent: str, max_requests: int):
+    """Запросы от одного клиента до первого ответа 429"""
+
+    headers = {"X-Request-Id": "test", "User-Agent": user_agent}
+    allowed = 0
+    for _ in range(max_requests):
+        async with client_session.get(HEALTHCHECK_URL, headers=headers) as raw_response:
+            if raw_response.status == HTTPStatus.TOO_MANY_REQUESTS:
+                return allowed, raw_response.headers, await raw_response.json()
+
+            assert raw_response.status == HTTPStatus.OK
+            allowed += 1
+
+    return allowed, None, None
+
+
+async def test_request_limit_exceeded_429(client_session):
+    user_agent = f"rate-limit-test/{uuid.uuid4()}"
+
+    async with client_session.get(
+        HEALTHCHECK_URL, headers={"X-Request-Id": "test", "User-Agent": user_agent}
+    ) as raw_response:
+        assert raw_response.status == HTTPStatus.OK
+        limit = int(raw_response.headers["X-RateLimit-Limit"])
+        assert int(raw_response.headers["X-RateLimit-Remaining"]) < limit
+
+    allowed, headers, response = await hit_until_limited(
+        client_session, user_agent, limit * 2
+    )
+
+    # за время теста лимит может восстановиться на один запрос
+    assert headers is not None
+    assert allowed <= limit
+    assert int(headers["Retry-After"]) >= 1
+    assert headers["X-RateLimit-Remaining"] == "0"
+    assert response["message"] == "Слишком много запросов от данного пользователя"
+
+
+async def test_request_limit_redis_error_fails_open_200(client_session):
+    redis = Redis.from_url(
+        f"redis://{test_settings.redis.redis_host}:{test_settings.redis.redis_port}",
+        decode_responses=True,
+    )
+    config = await redis.config_get("maxmemory*")
+    # без свободной памяти Redis отклоняет запись в скрипте лимита ошибкой OOM
+    await redis.config_set("maxmemory-policy", "noeviction")
+    await redis.config_set("maxmemory", 1)
+    try:
+        async with client_session.get(
+            HEALTHCHECK_URL,
+            headers={"X-Request-Id": "test", "User-Agent": f"rate-limit-test/{uuid.uuid4()}"},
+        ) as raw_response:
+            status = raw_response.status
+    finally:
+        await redis.config_set("maxmemory", config["maxmemory"])
+        await redis.config_set("maxmemory-policy", config["maxmemory-policy"])
+        await redis.close()
+
+    assert status == HTTPStatus.OK
+
+
+async def test_request_limit_is_per_client_200(client_session):
+    allowed, headers, _ = await hit_until_limited(
+        client_session, f"rate-limit-test/{uuid.uuid4()}", 100
+    )
+    assert headers is not None
+
+    async with client_session.get(
+        HEALTHCHECK_URL,
+        headers={"X-Request-Id": "test", "User-Agent": f"rate-limit-test/{uuid.uuid4()}"},
+    ) as raw_response:
+        assert raw_response.status == HTTPStatus.OK
+
+
+async def get_rate_limiter_stats(client_session, headers: dict) -> dict:
+    async with client_session.get(METRICS_URL, headers=headers) as raw_response:
+        assert raw_response.status == HTTPStatus.OK
+
+        return (await raw_response.json())["rate_limiter"]
+
+
+async def test_hybrid_request_limit_429(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    metrics_headers = {"X-Request-Id": "test", "User-Agent": f"metrics/{uuid.uuid4()}"}
+
+    before = await get_rate_limiter_stats(client_session, metrics_headers)
+    if "local_decisions" not in before:
+        pytest.skip("Сервис запущен не с RATE_LIMIT_BACKEND=hybrid")
+
+    user_agent = f"rate-limit-test/{uuid.uuid4()}"
+    allowed, headers, _ = await hit_until_limited(
+        client_session, user_agent, test_settings.request_limit_per_minute * 2
+    )
+
+    # между синхронизациями воркер пропускает не больше local_burst запросов
+    # клиента, поэтому превышение лимита ограничено одной порцией
+    assert headers is not None
+    assert 0 < allowed <= (
+        test_settings.request_limit_per_minute + test_settings.rate_limit_local_burst
+    )
+
+    # после синхронизации остаток корзины приходит из Redis, и отказ сохраняется
+    await asyncio.sleep(test_settings.rate_limit_sync_interval_ms * 2 / 1000)
+    async with client_session.get(
+        HEALTHCHECK_URL, headers={"X-Request-Id": "test", "User-Agent": user_agent}
+    ) as raw_response:
+        assert raw_response.status == HTTPStatus.TOO_MANY_REQUESTS
+
+    after = await get_rate_limiter_stats(client_session, metrics_headers)
+
+    # решения принимаются по локальной корзине, а в Redis воркер обращается
+    # только фоновой синхронизацией, одним конвейером на все корзины
+    assert after["local_decisions"] - before["local_decisions"] >= allowed + 3
+    assert after["syncs"] > before["syncs"]
+    assert after["redis_calls"] - before["redis_calls"] == after["syncs"] - before["syncs"]
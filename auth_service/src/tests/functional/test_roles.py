@@ -1,3 +1,4 @@
+import uuid
 from http import HTTPStatus
 from urllib.parse import urljoin
 
@@ -8,6 +9,9 @@ from settings import test_settings
 GENERAL_ROLE_ENDPOINT = "auth/api/v1/role"
 GENERAL_ROLE_URL = urljoin(test_settings.auth_api_url, GENERAL_ROLE_ENDPOINT)
 
+USER_ENDPOINT = "auth/api/v1/user"
+USER_URL = urljoin(test_settings.auth_api_url, USER_ENDPOINT)
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -51,6 +55,19 @@ async def test_get_all_roles_success_200(access_token_admin, client_session):
         assert response[2]["name"] == "subscriber"
 
 
+async def test_get_all_roles_not_modified_304(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    async with client_session.get(GENERAL_ROLE_URL, headers=headers) as raw_response:
+        etag = raw_response.headers["ETag"]
+
+    headers["If-None-Match"] = etag
+    async with client_session.get(GENERAL_ROLE_URL, headers=headers) as raw_response:
+        assert raw_response.status == HTTPStatus.NOT_MODIFIED
+        assert raw_response.headers["ETag"] == etag
+
+
 async def test_role_creating_w_already_existing_name(
     access_token_admin,
     client_session,
@@ -166,3 +183,43 @@ async def test_role_deleting_success(access_token_admin, client_session):
         assert response is None
 
     await client_session.post(GENERAL_ROLE_URL, params={"role_name": "subscriber"})
+
+
+async def test_bulk_role_assignment_success_200(
+    access_token_admin, add_user_to_table, client_session, delete_row_from_table
+):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+    users = {uuid.uuid4(): f"bulk_user_{i}" for i in range(3)}
+    for id, login in users.items():
+        await add_user_to_table(id=id, login=login, email=f"{login}@mail.ru", password="x")
+
+    async with client_session.post(
+            GENERAL_ROLE_URL, params={"role_name": "bulk_role"}, headers=headers,
+    ) as raw_response:
+        role = await raw_response.json()
+
+    async with client_session.patch(
+            USER_URL + "/roles/bulk",
+            json={"role_id": role["id"], "logins": [*users.values(), "unknown_login"]},
+            headers=headers,
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["updated"] == 3
+        assert sum(response["chunks"]) == 3
+
+    async with client_session.patch(
+            USER_URL + "/roles/bulk",
+            json={"role_id": None, "filter": {"role_id": role["id"]}},
+            headers=headers,
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert response["updated"] == 3
+
+    await client_session.delete(GENERAL_ROLE_URL, params={"role_name": "bulk_role"})
+    for id in users:
+        await delete_row_from_table("users", id)
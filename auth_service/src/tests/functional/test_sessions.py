@@ -0,0 +1,88 @@
+import asyncio
+import random
+import uuid
+from http import HTTPStatus
+from urllib.parse import urljoin
+
+import aiohttp
+import pytest
+from werkzeug.security import generate_password_hash
+
+from settings import test_settings
+
+SESSIONS_ENDPOINT = "auth/api/v1/user/sessions"
+SESSIONS_URL = urljoin(test_settings.auth_api_url, SESSIONS_ENDPOINT)
+LOGIN_URL = urljoin(test_settings.auth_api_url, "auth/api/v1/login")
+LOGOUT_URL = urljoin(test_settings.auth_api_url, "auth/api/v1/user/logout")
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_sessions_wo_access_401(client_session):
+    client_session.cookie_jar.clear()
+    headers = {"X-Request-Id": "test"}
+
+    async with client_session.get(SESSIONS_URL, headers=headers) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.UNAUTHORIZED
+        assert response["detail"] == "В cookies отсутствует access token"
+
+
+async def test_get_sessions_success_200(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    async with client_session.get(SESSIONS_URL, headers=headers) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.OK
+        assert isinstance(response, list)
+
+
+async def test_session_revoking_not_found(access_token_admin, client_session):
+    client_session.cookie_jar.update_cookies({"access_token": access_token_admin})
+    headers = {"X-Request-Id": "test"}
+
+    async with client_session.delete(
+        SESSIONS_URL + "/unknown_session", headers=headers
+    ) as raw_response:
+        response = await raw_response.json()
+
+        assert raw_response.status == HTTPStatus.NOT_FOUND
+        assert response["detail"] == "Сессии с id 'unknown_session' не существует"
+
+
+async def test_access_token_rejected_after_logout_401(
+    add_user_to_table, delete_row_from_table
+):
+    id = uuid.uuid4()
+    login = "User" + str(random.randint(1, 1000))
+    email = "Email" + str(random.randint(1, 1000))
+    password = generate_password_hash("Password")
+    headers = {"X-Request-Id": "test"}
+
+    await add_user_to_table(id=id, login=login, email=email, password=password)
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            LOGIN_URL, json={"user_login": login, "password": "Password"}, headers=headers
+        ) as raw_response:
+            assert raw_response.status == HTTPStatus.OK
+            cookies = {
+                name: raw_response.cookies[name].value
+                for name in ("access_token", "refresh_token")
+            }
+
+        async with session.get(SESSIONS_URL, headers=headers, cookies=cookies) as raw_response:
+            assert raw_response.status == HTTPStatus.OK
+
+        async with session.get(LOGOUT_URL, headers=headers, cookies=cookies) as raw_response:
+            assert raw_response.status == HTTPStatus.OK
+
+        async with session.get(SESSIONS_URL, headers=headers, cookies=cookies) as raw_response:
+            assert raw_response.status == HTTPStatus.UNAUTHORIZED
+
+    # история входа пишется фоновой задачей
+    await asyncio.sleep(1.5)
+    await delete_row_from_table("authentication_histories", id, "user_id")
+    await delete_row_from_table("users", id)
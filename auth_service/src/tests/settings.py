@@ -21,6 +21,9 @@ class PostgresSettings(BaseSettings):
     postgres_password: str
 
     db_dsn: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_replica_max_lag_seconds: float = 5.0
 
 
 class TestSettings(BaseSettings):
@@ -29,6 +32,9 @@ class TestSettings(BaseSettings):
     auth_api_url: str = "http://127.0.0.1:8000"
 
     auth_algorithm: str = "RS256"
+    request_limit_per_minute: int = 20
+    rate_limit_sync_interval_ms: int = 200
+    rate_limit_local_burst: int = 5
     public_key: str
     private_key: str
 
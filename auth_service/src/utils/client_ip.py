@@ -0,0 +1,46 @@
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
+
+from fastapi import Request
+
+from src.core.config import settings
+
+
+@lru_cache
+def trusted_networks() -> tuple:
+    return tuple(ip_network(proxy, strict=False) for proxy in settings.trusted_proxies)
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+
+    return any(address in network for network in trusted_networks())
+
+
+def get_client_ip(request: Request) -> str | None:
+    """
+    Адрес клиента с учетом прокси.
+
+    X-Forwarded-For и X-Real-IP учитываются, только если запрос пришел
+    от доверенного прокси (TRUSTED_PROXIES). В X-Forwarded-For клиентом
+    считается последний адрес справа, который не принадлежит доверенным
+    прокси: адреса левее мог подставить сам клиент
+    """
+
+    peer = request.client.host if request.client else None
+    if peer is None or not is_trusted_proxy(peer):
+        return peer
+
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
+
+    return request.headers.get("x-real-ip") or peer
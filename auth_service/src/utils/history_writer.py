@@ -0,0 +1,204 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db.postgres import async_session
+from src.repositories.auth_history import AuthHistoryRepository
+
+
+@dataclass(frozen=True)
+class AuthHistoryEvent:
+    """Попытка входа, ожидающая записи в БД"""
+
+    login: str
+    user_agent: str | None
+    success: bool
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class HistoryWriteError(Exception):
+    """Пачку не удалось записать из-за ошибки БД, не связанной с ее строками"""
+
+    def __init__(self, events: list[AuthHistoryEvent]) -> None:
+        super().__init__(f"{len(events)} событий не записаны")
+        self.events = events
+
+
+class AuthHistoryWriter:
+    """
+    Буферизированная запись истории аутентификаций.
+
+    Обработчик входа только кладет событие в очередь в памяти, а фоновая
+    задача пишет накопленные события одним многострочным INSERT каждые
+    batch_size событий или flush_interval_ms миллисекунд. Очередь
+    ограничена max_queue_size, события сверх нее отбрасываются.
+
+    Временная ошибка БД повторяется max_retries раз с удваивающейся
+    паузой, после чего пачка возвращается в начало очереди до следующей
+    записи. Пачка с некорректной строкой (например, пользователь удален
+    между входом и записью) делится пополам, пока не останутся отдельные
+    строки, и отбрасываются только они.
+    При остановке сервиса очередь дописывается в БД
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval_ms: int,
+        max_queue_size: int,
+        max_retries: int,
+        retry_backoff_ms: int,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self._queue: deque[AuthHistoryEvent] = deque()
+        self._wakeup = asyncio.Event()
+        self._running = False
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.splits = 0
+        self.requeued = 0
+        self.flushes = 0
+
+    def add(self, event: AuthHistoryEvent) -> None:
+        """Постановка события в очередь на запись"""
+
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            auth_logger.warning(
+                f"Очередь истории аутентификаций переполнена, "
+                f"событие для '{event.login}' отброшено"
+            )
+            return
+
+        self._queue.append(event)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def write_batch(self, batch: list[AuthHistoryEvent]) -> None:
+        """
+        Запись пачки с повторами временных ошибок и делением пачки
+        при ошибке в данных. Незаписанные события передаются в HistoryWriteError
+        """
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with async_session() as db:
+                    self.written += await AuthHistoryRepository(db).add_history_batch(
+                        batch
+                    )
+                return
+            except (IntegrityError, DataError) as exc:
+                if len(batch) == 1:
+                    self.failed += 1
+                    auth_logger.error(
+                        f"Событие истории аутентификаций для '{batch[0].login}' "
+                        f"отброшено: {exc}"
+                    )
+                    return
+
+                self.splits += 1
+                middle = len(batch) // 2
+                try:
+                    await self.write_batch(batch[:middle])
+                except HistoryWriteError as error:
+                    raise HistoryWriteError(
+                        error.events + batch[middle:]
+                    ) from error.__cause__
+                await self.write_batch(batch[middle:])
+                return
+            except Exception as exc:
+                if attempt == self.max_retries:
+                    raise HistoryWriteError(batch) from exc
+
+                self.retries += 1
+                auth_logger.warning(
+                    f"Ошибка записи {len(batch)} событий истории аутентификаций, "
+                    f"повтор {attempt + 1} из {self.max_retries}: {exc}"
+                )
+                await asyncio.sleep(self.retry_backoff_ms * 2**attempt / 1000)
+
+    async def flush(self) -> None:
+        """Запись всех накопленных событий пачками по batch_size"""
+
+        while self._queue:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            self.flushes += 1
+            try:
+                await self.write_batch(batch)
+            except HistoryWriteError as error:
+                # БД недоступна, события ждут следующей записи
+                self._queue.extendleft(reversed(error.events))
+                self.requeued += len(error.events)
+                auth_logger.error(
+                    f"{len(error.events)} событий истории аутентификаций возвращены "
+                    f"в очередь: {error.__cause__}"
+                )
+                return
+
+    async def _flush_periodically(self) -> None:
+        while self._running:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.flush_interval_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        self._running = True
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Остановка с записью оставшихся событий"""
+
+        self._running = False
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._queue:
+            self.failed += len(self._queue)
+            auth_logger.error(
+                f"При остановке не записаны {len(self._queue)} событий "
+                f"истории аутентификаций"
+            )
+            self._queue.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "splits": self.splits,
+            "requeued": self.requeued,
+            "flushes": self.flushes,
+        }
+
+
+auth_history_writer = AuthHistoryWriter(
+    settings.auth_history_batch_size,
+    settings.auth_history_flush_interval_ms,
+    settings.auth_history_max_queue_size,
+    settings.auth_history_max_retries,
+    settings.auth_history_retry_backoff_ms,
+)
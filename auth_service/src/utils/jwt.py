@@ -3,13 +3,19 @@ import datetime as dt
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import Tuple
+import uuid
 
 import jwt
 from fastapi import Request
 from fastapi.exceptions import HTTPException
 
-from src.core.config import settings
 from src.core.logger import auth_logger
+from src.utils.key_ring import key_ring
+from src.utils.revocation import revocation_list
+from src.utils.token_cache import verified_token_cache
+
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=15)
+REFRESH_TOKEN_LIFETIME = timedelta(days=10)
 
 
 async def calculate_current_date_and_time() -> Tuple[dt, int]:
@@ -31,8 +37,8 @@ async def calculate_iat_and_exp_tokens() -> Tuple[int, int, int]:
         await calculate_current_date_and_time()
     )
 
-    exp_access_token = current_date_and_time_datetime + timedelta(minutes=15)
-    exp_refresh_token = current_date_and_time_datetime + timedelta(days=10)
+    exp_access_token = current_date_and_time_datetime + ACCESS_TOKEN_LIFETIME
+    exp_refresh_token = current_date_and_time_datetime + REFRESH_TOKEN_LIFETIME
 
     exp_access_token_timestamp = int(calendar.timegm(exp_access_token.timetuple()))
     exp_refresh_token_timestamp = int(calendar.timegm(exp_refresh_token.timetuple()))
@@ -40,19 +46,61 @@ async def calculate_iat_and_exp_tokens() -> Tuple[int, int, int]:
     return iat_timestamp, exp_access_token_timestamp, exp_refresh_token_timestamp
 
 
+def encode_token(payload: dict) -> str:
+    """Signs payload with the active key of the key ring"""
+
+    signing_key = key_ring.signing_key
+    headers = {"alg": signing_key.algorithm, "typ": "JWT", "kid": signing_key.kid}
+
+    try:
+        return jwt.encode(
+            payload,
+            signing_key.key,
+            algorithm=signing_key.algorithm,
+            headers=headers,
+        )
+    except (TypeError, ValueError) as err:
+        auth_logger.error(f"Error while JWT encoding: {err}")
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail="Error while JWT encoding",
+        )
+
+
+async def create_access_token(
+    user_login: str, user_role: str, session_id: str, access_token_id: str
+) -> str:
+    """Creates access token"""
+
+    iat, exp_access_token, _ = await calculate_iat_and_exp_tokens()
+
+    access_token_payload = {
+        "iss": "Auth service",
+        "user_login": user_login,
+        "user_role": user_role,
+        "sid": session_id,
+        "jti": access_token_id,
+        "type": "access",
+        "exp": exp_access_token,
+        "iat": iat,
+    }
+
+    return encode_token(access_token_payload)
+
+
 async def create_access_and_refresh_tokens(
-    user_login: str, user_role: str
+    user_login: str, user_role: str, session_id: str, access_token_id: str
 ) -> Tuple[str, str]:
     """Creates a pair of access and refresh tokens"""
 
     iat, exp_access_token, exp_refresh_token = await calculate_iat_and_exp_tokens()
 
-    headers = {"alg": settings.auth_algorithm, "typ": "JWT"}
-
     access_token_payload = {
         "iss": "Auth service",
         "user_login": user_login,
         "user_role": user_role,
+        "sid": session_id,
+        "jti": access_token_id,
         "type": "access",
         "exp": exp_access_token,
         "iat": iat,
@@ -62,42 +110,44 @@ async def create_access_and_refresh_tokens(
         "iss": "Auth service",
         "user_login": user_login,
         "user_role": user_role,
+        "sid": session_id,
+        "jti": uuid.uuid4().hex,
         "type": "refresh",
         "exp": exp_refresh_token,
         "iat": iat,
     }
 
+    return encode_token(access_token_payload), encode_token(refresh_token_payload)
+
+
+async def get_unverified_claims(token: str) -> dict[str, str]:
+    """
+    Reads token claims without signature verification.
+    Result may only be used as a lookup key before the token is verified
+    """
+
     try:
-        encoded_access_token: str = jwt.encode(
-            access_token_payload,
-            settings.private_key,
-            algorithm=settings.auth_algorithm,
-            headers=headers,
-        )
-        encoded_refresh_token: str = jwt.encode(
-            refresh_token_payload,
-            settings.private_key,
-            algorithm=settings.auth_algorithm,
-            headers=headers,
-        )
-    except (TypeError, ValueError) as err:
-        auth_logger.error(f"Error while JWT encoding: {err}")
+        return jwt.decode(token, options={"verify_signature": False})
+    except jwt.exceptions.DecodeError as decode_error:
+        auth_logger.error(f"Error while JWT decoding: {decode_error}")
         raise HTTPException(
-            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-            detail="Error while JWT encoding",
+            status_code=HTTPStatus.UNAUTHORIZED, detail="Неверный токен"
         )
 
-    return encoded_access_token, encoded_refresh_token
 
-
-async def validate_token(token: str) -> dict[str, str]:
-    """Validates token"""
+def decode_token(token: str) -> dict[str, str]:
+    """Verifies token signature and expiration"""
 
     try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        verification_key = key_ring.get_verification_key(kid)
+        if not verification_key:
+            raise jwt.exceptions.DecodeError(f"Unknown key id '{kid}'")
+
         decoded_token: dict[str, str] = jwt.decode(
             jwt=token,
-            key=settings.public_key,
-            algorithms=["RS256"],
+            key=verification_key.key,
+            algorithms=[verification_key.algorithm],
         )
     except jwt.exceptions.DecodeError as decode_error:
         auth_logger.error(f"Error while JWT decoding: {decode_error}")
@@ -119,7 +169,26 @@ async def validate_token(token: str) -> dict[str, str]:
     return decoded_token
 
 
-async def check_token_and_role(request: Request, roles: list) -> None:
+async def validate_token(token: str) -> dict[str, str]:
+    """Validates token"""
+
+    decoded_token = verified_token_cache.get(token) if token else None
+    if decoded_token is None:
+        decoded_token = decode_token(token)
+        verified_token_cache.set(token, decoded_token)
+
+    token_id = decoded_token.get("jti")
+    if token_id and await revocation_list.is_revoked(token_id):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED, detail="Токен отозван"
+        )
+
+    return decoded_token
+
+
+async def get_access_token_claims(request: Request) -> dict[str, str]:
+    """Validates access token from cookies and returns its claims"""
+
     access_token = request.cookies.get("access_token")
     if not access_token:
         raise HTTPException(
@@ -127,7 +196,11 @@ async def check_token_and_role(request: Request, roles: list) -> None:
             detail="В cookies отсутствует access token",
         )
 
-    decoded_token = await validate_token(access_token)
+    return await validate_token(access_token)
+
+
+async def check_token_and_role(request: Request, roles: list) -> None:
+    decoded_token = await get_access_token_claims(request)
     if decoded_token.get("user_role") not in roles:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail="Нет прав для совершения действия"
@@ -0,0 +1,199 @@
+import asyncio
+import dataclasses
+import os
+import time
+from typing import Any
+
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+from src.core.config import Settings, settings
+from src.core.logger import auth_logger
+from src.utils.keys_file import SigningKey, VerificationKey, read_keys_file
+from src.utils.token_algorithms import (
+    get_token_algorithm,
+    token_algorithm_for_public_key,
+)
+
+
+class KeyRing:
+    """
+    Разобранные ключи JWT по kid.
+
+    Хранит один ключ подписи и любое число ключей проверки, поэтому
+    токены, подписанные прежним ключом, остаются действительными во время
+    ротации. Если задан AUTH_KEYS_FILE, ключи читаются из этого файла,
+    и каждый воркер раз в check_interval_seconds проверяет время его
+    изменения и перечитывает ключи, так ротация доходит до всех воркеров
+    без перезапуска. Ключ, пропавший из файла, принимается еще
+    retain_seconds, пока не истекут подписанные им токены
+    """
+
+    def __init__(
+        self,
+        signing_key: SigningKey,
+        verification_keys: list[VerificationKey],
+        default_kid: str | None = None,
+        keys_file: str | None = None,
+        check_interval_seconds: float = 5.0,
+        retain_seconds: float = 0.0,
+    ) -> None:
+        self._signing_key = signing_key
+        self._verification_keys = {key.kid: key for key in verification_keys}
+        self.default_kid = default_kid or signing_key.kid
+        self.keys_file = keys_file
+        self.check_interval_seconds = check_interval_seconds
+        self.retain_seconds = retain_seconds
+        self._keys_file_mtime: float | None = None
+        self._task: asyncio.Task | None = None
+        self.reloads = 0
+        self.reload_errors = 0
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "KeyRing":
+        """
+        Ключи из файла AUTH_KEYS_FILE или из PEM ключей в настройках.
+        Алгоритм дополнительных ключей проверки определяется по типу ключа
+        """
+
+        if config.auth_keys_file:
+            return cls.from_file(config)
+
+        algorithm = get_token_algorithm(config.auth_algorithm)
+        signing_key = SigningKey(
+            kid=config.auth_key_id,
+            algorithm=algorithm.name,
+            key=algorithm.load_private_key(config.private_key),
+        )
+        verification_keys = [
+            VerificationKey(
+                kid=config.auth_key_id,
+                algorithm=algorithm.name,
+                key=algorithm.load_public_key(config.public_key),
+            )
+        ]
+        for kid, public_key in config.auth_verification_keys.items():
+            key = load_pem_public_key(public_key.encode())
+            verification_keys.append(
+                VerificationKey(
+                    kid=kid,
+                    algorithm=token_algorithm_for_public_key(key).name,
+                    key=key,
+                )
+            )
+
+        return cls(signing_key, verification_keys)
+
+    @classmethod
+    def from_file(cls, config: Settings) -> "KeyRing":
+        """Ключи из файла AUTH_KEYS_FILE, ошибка чтения не дает сервису запуститься"""
+
+        mtime, signing_key, verification_keys = read_keys_file(config.auth_keys_file)
+        key_ring = cls(
+            signing_key,
+            verification_keys,
+            default_kid=config.auth_key_id,
+            keys_file=config.auth_keys_file,
+            check_interval_seconds=config.auth_keys_check_interval_seconds,
+            retain_seconds=config.auth_keys_retain_seconds,
+        )
+        key_ring._keys_file_mtime = mtime
+
+        return key_ring
+
+    @property
+    def signing_key(self) -> SigningKey:
+        """Действующий ключ подписи"""
+
+        return self._signing_key
+
+    def get_verification_key(self, kid: str | None) -> VerificationKey | None:
+        """
+        Ключ проверки по kid.
+        Токены без kid проверяются ключом, заданным при запуске.
+        Незнакомый kid может означать, что другой воркер уже прочитал
+        новый файл ключей, поэтому файл проверяется сразу
+        """
+
+        kid = kid or self.default_kid
+        key = self._verification_keys.get(kid)
+        if key is None and self.keys_file and self.reload_if_changed():
+            key = self._verification_keys.get(kid)
+
+        if key is None or (key.expires_at is not None and key.expires_at <= time.time()):
+            return None
+
+        return key
+
+    def replace_keys(
+        self, signing_key: SigningKey, verification_keys: list[VerificationKey]
+    ) -> None:
+        """
+        Замена набора ключей. Ключи, которых нет в новом наборе,
+        принимаются еще retain_seconds
+        """
+
+        now = time.time()
+        keys = {key.kid: key for key in verification_keys}
+        for kid, key in self._verification_keys.items():
+            if kid in keys or (key.expires_at is not None and key.expires_at <= now):
+                continue
+            retain_until = now + self.retain_seconds
+            if key.expires_at is not None:
+                retain_until = min(retain_until, key.expires_at)
+            keys[kid] = dataclasses.replace(key, expires_at=retain_until)
+
+        self._verification_keys = keys
+        self._signing_key = signing_key
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитывание файла ключей, если он изменился.
+        Ошибка чтения оставляет прежние ключи
+        """
+
+        try:
+            mtime = os.stat(self.keys_file).st_mtime
+            if mtime == self._keys_file_mtime:
+                return False
+            # испорченный файл не перечитывается, пока его не заменят
+            self._keys_file_mtime = mtime
+            _, signing_key, verification_keys = read_keys_file(self.keys_file)
+        except Exception as exc:
+            self.reload_errors += 1
+            auth_logger.error(f"Ошибка чтения файла ключей {self.keys_file}: {exc}")
+            return False
+
+        self.replace_keys(signing_key, verification_keys)
+        self.reloads += 1
+        auth_logger.info(
+            f"Ключи JWT загружены из {self.keys_file}, подпись ключом "
+            f"'{signing_key.kid}'"
+        )
+
+        return True
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            self.reload_if_changed()
+
+    def start(self) -> None:
+        if self.keys_file:
+            self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "signing_kid": self._signing_key.kid,
+            "verification_kids": sorted(self._verification_keys),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+key_ring = KeyRing.from_settings(settings)
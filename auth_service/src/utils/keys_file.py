@@ -0,0 +1,78 @@
+import os
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
+
+from src.utils.token_algorithms import token_algorithm_for_public_key
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """Разобранный закрытый ключ для подписи токенов"""
+
+    kid: str
+    algorithm: str
+    key: Any
+
+
+@dataclass(frozen=True)
+class VerificationKey:
+    """
+    Разобранный открытый ключ для проверки токенов.
+    После expires_at (unix time) токены с этим kid не принимаются
+    """
+
+    kid: str
+    algorithm: str
+    key: Any
+    expires_at: float | None = None
+
+
+def parse_keys_file(data: dict) -> tuple[SigningKey, list[VerificationKey]]:
+    """
+    Разбор файла ключей вида
+    {"signing_kid": "<kid>", "keys": {"<kid>": {"private_key": "<PEM>",
+    "public_key": "<PEM>", "expires_at": <unix time>}}}.
+    Закрытый ключ нужен только ключу подписи, алгоритм определяется по типу ключа
+    """
+
+    signing_kid = data["signing_kid"]
+    verification_keys = []
+    signing_key = None
+    for kid, entry in data["keys"].items():
+        public_key = load_pem_public_key(entry["public_key"].encode())
+        algorithm = token_algorithm_for_public_key(public_key)
+        verification_keys.append(
+            VerificationKey(
+                kid=kid,
+                algorithm=algorithm.name,
+                key=public_key,
+                expires_at=entry.get("expires_at"),
+            )
+        )
+        if kid == signing_kid:
+            signing_key = SigningKey(
+                kid=kid,
+                algorithm=algorithm.name,
+                key=load_pem_private_key(entry["private_key"].encode(), password=None),
+            )
+
+    if signing_key is None:
+        raise ValueError(f"В файле ключей нет ключа подписи '{signing_kid}'")
+
+    return signing_key, verification_keys
+
+
+def read_keys_file(path: str) -> tuple[float, SigningKey, list[VerificationKey]]:
+    """Время изменения и ключи файла"""
+
+    mtime = os.stat(path).st_mtime
+    with open(path, "rb") as keys_file:
+        signing_key, verification_keys = parse_keys_file(orjson.loads(keys_file.read()))
+
+    return mtime, signing_key, verification_keys
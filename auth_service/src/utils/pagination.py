@@ -0,0 +1,28 @@
+import base64
+from datetime import datetime
+from http import HTTPStatus
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """Opaque keyset cursor for (created_at, id)"""
+
+    raw = f"{created_at.isoformat()}|{item_id}"
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Restores (created_at, id) from a cursor made by encode_cursor"""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail="Неверный курсор пагинации"
+        )
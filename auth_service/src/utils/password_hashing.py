@@ -0,0 +1,317 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is only needed for the argon2id policy
+    argon2 = None
+
+ARGON2_COST_PARAMETERS = (
+    "time_cost",
+    "memory_cost",
+    "parallelism",
+    "hash_len",
+    "salt_len",
+)
+
+
+class PasswordHashingPolicy:
+    """
+    Current password hashing algorithm and its cost parameters.
+
+    PBKDF2 and scrypt hashes are produced by werkzeug
+    ("pbkdf2:sha256:<iterations>$..." and "scrypt:<n>:<r>:<p>$..."),
+    argon2id hashes by argon2-cffi in the PHC format ("$argon2id$...").
+    A stored hash made by another algorithm or with lower cost
+    parameters is reported by needs_rehash. Hashes with higher cost
+    parameters are kept, so raising the cost in one place and lowering
+    it in the settings doesn't silently downgrade them.
+    A missing argon2-cffi for the argon2id policy is reported by Settings
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        pbkdf2_iterations: int,
+        scrypt_n: int,
+        scrypt_r: int,
+        scrypt_p: int,
+        argon2_time_cost: int,
+        argon2_memory_cost: int,
+        argon2_parallelism: int,
+    ) -> None:
+        self.algorithm = algorithm
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.scrypt_params = (scrypt_n, scrypt_r, scrypt_p)
+        self._argon2 = None
+        if argon2 is not None:
+            self._argon2 = argon2.PasswordHasher(
+                time_cost=argon2_time_cost,
+                memory_cost=argon2_memory_cost,
+                parallelism=argon2_parallelism,
+                type=argon2.Type.ID,
+            )
+
+    @property
+    def werkzeug_method(self) -> str:
+        if self.algorithm == "pbkdf2":
+            return f"pbkdf2:sha256:{self.pbkdf2_iterations}"
+
+        return "scrypt:{}:{}:{}".format(*self.scrypt_params)
+
+    def hash(self, password: str) -> str:
+        if self.algorithm == "argon2id":
+            return self._argon2.hash(password)
+
+        return generate_password_hash(password, method=self.werkzeug_method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        if password_hash.startswith("$argon2"):
+            if self._argon2 is None:
+                auth_logger.error("argon2-cffi is required to verify argon2 hashes")
+                return False
+            try:
+                return self._argon2.verify(password_hash, password)
+            except argon2.exceptions.Argon2Error:
+                return False
+
+        if not password_hash.startswith(("pbkdf2:", "scrypt:")):
+            return False
+
+        try:
+            return check_password_hash(password_hash, password)
+        except ValueError:
+            return False
+
+    def can_verify(self, password_hash: str) -> bool:
+        """Hash is in a format verify() understands"""
+
+        if password_hash.startswith("$argon2"):
+            return self._argon2 is not None
+
+        method, _, rest = password_hash.partition("$")
+        return method.startswith(("pbkdf2:", "scrypt:")) and "$" in rest
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Stored hash is weaker than the current policy"""
+
+        if self.algorithm == "argon2id":
+            if not password_hash.startswith("$argon2id$"):
+                return True
+            try:
+                params = argon2.extract_parameters(password_hash)
+            except argon2.exceptions.InvalidHashError:
+                return True
+            # check_needs_rehash() reports any difference, stronger hashes included
+            return params.version < argon2.low_level.ARGON2_VERSION or any(
+                getattr(params, name) < getattr(self._argon2, name)
+                for name in ARGON2_COST_PARAMETERS
+            )
+
+        method = password_hash.split("$", 1)[0]
+        if self.algorithm == "pbkdf2":
+            algorithm, _, params = method.partition(":")
+            hash_name, _, iterations = params.partition(":")
+            return (
+                algorithm != "pbkdf2"
+                or hash_name != "sha256"
+                or not iterations.isdigit()
+                or int(iterations) < self.pbkdf2_iterations
+            )
+
+        algorithm, *params = method.split(":")
+        return (
+            algorithm != "scrypt"
+            or len(params) != len(self.scrypt_params)
+            or not all(param.isdigit() for param in params)
+            or any(
+                int(param) < policy_param
+                for param, policy_param in zip(params, self.scrypt_params)
+            )
+        )
+
+
+password_policy = PasswordHashingPolicy(
+    settings.password_hash_algorithm,
+    settings.password_hash_pbkdf2_iterations,
+    settings.password_hash_scrypt_n,
+    settings.password_hash_scrypt_r,
+    settings.password_hash_scrypt_p,
+    settings.password_hash_argon2_time_cost,
+    settings.password_hash_argon2_memory_cost,
+    settings.password_hash_argon2_parallelism,
+)
+
+
+def hash_password(password: str) -> str:
+    """Hashes password with the current policy"""
+
+    return password_policy.hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Checks password against a hash made by any supported policy"""
+
+    return password_policy.verify(password_hash, password)
+
+
+def _timed_call(func: Callable, *args: Any) -> tuple[Any, float, float]:
+    """
+    Runs func inside the pool worker.
+    Start and finish are taken by the worker, so the parent can split
+    the latency into queue wait and hashing time
+    """
+
+    started_at = time.monotonic()
+    result = func(*args)
+
+    return result, started_at, time.monotonic()
+
+
+class TimingStats:
+    """Count, sum and max of observed durations in milliseconds"""
+
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        duration_ms = seconds * 1000
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class PasswordHasher:
+    """
+    Executes password hashing outside of the event loop.
+
+    Calls are sent to a thread or process pool of a fixed size. When more
+    than workers + queue_size calls are in flight, new calls are rejected
+    with 503 instead of growing the queue, so a login burst can't hold
+    every request of the worker behind it
+    """
+
+    def __init__(self, executor_kind: str, workers: int, queue_size: int) -> None:
+        self.executor_kind = executor_kind
+        self.workers = workers
+        self.max_in_flight = workers + queue_size
+        self._executor: Executor | None = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.queue_wait = TimingStats()
+        self.hash_time = TimingStats()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password_hashing"
+                )
+
+        return self._executor
+
+    def _observe(self, submitted_at: float, started_at: float, finished_at: float):
+        self.queue_wait.observe(max(started_at - submitted_at, 0))
+        self.hash_time.observe(finished_at - started_at)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Runs func in the pool without blocking the event loop"""
+
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            auth_logger.warning("Password hashing queue is full")
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Сервис перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"},
+            )
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            result, started_at, finished_at = await loop.run_in_executor(
+                self.executor, _timed_call, func, *args
+            )
+        finally:
+            self.in_flight -= 1
+        self._observe(submitted_at, started_at, finished_at)
+
+        return result
+
+    def run_blocking(self, func: Callable, *args: Any) -> Any:
+        """Runs func in the pool and waits for the result, for sync callers"""
+
+        submitted_at = time.monotonic()
+        result, started_at, finished_at = self.executor.submit(
+            _timed_call, func, *args
+        ).result()
+        self._observe(submitted_at, started_at, finished_at)
+
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hashes password"""
+
+        return await self.run(hash_password, password)
+
+    async def verify(self, password_hash: str, password: str) -> bool:
+        """Checks password against its hash"""
+
+        return await self.run(verify_password, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash: str) -> bool:
+        """Stored hash should be replaced on the next successful login"""
+
+        return password_policy.needs_rehash(password_hash)
+
+    def hash_blocking(self, password: str) -> str:
+        """Hashes password from sync code"""
+
+        return self.run_blocking(hash_password, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.stats(),
+            "hash_time": self.hash_time.stats(),
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.password_hashing_executor,
+    settings.password_hashing_workers,
+    settings.password_hashing_queue_size,
+)
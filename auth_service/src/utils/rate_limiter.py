@@ -0,0 +1,334 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+
+from fastapi import Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db import cache
+from src.utils.client_ip import get_client_ip
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit"
+
+# GCRA (generic cell rate algorithm): в Redis хранится только
+# теоретическое время прихода следующего запроса (TAT), поэтому
+# лимит не сбрасывается скачком на границе минуты.
+# Время берется у Redis, чтобы не зависеть от часов воркеров
+GCRA_SCRIPT = """
+local emission_interval = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+
+local delay_tolerance = emission_interval * limit
+local new_tat = tat + emission_interval * cost
+local allow_at = new_tat - delay_tolerance
+
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+local remaining = math.floor((delay_tolerance - (new_tat - now)) / emission_interval)
+return {1, remaining, 0, new_tat - now}
+"""
+
+# Глобальная корзина токенов: воркер присылает, сколько запросов
+# он пропустил с прошлой синхронизации, и получает остаток корзины.
+# Остаток может уйти в минус, если воркеры вместе превысили лимит
+TOKEN_BUCKET_SYNC_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local consumed = tonumber(ARGV[3])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + (now - updated_at) * rate) - consumed
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate))
+return tostring(tokens)
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Результат проверки лимита запросов"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after_ms: int
+    reset_after_ms: int
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after_ms / 1000)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(math.ceil(self.retry_after_ms / 1000))
+
+        return headers
+
+
+class BaseRateLimiter:
+    """Базовый класс ограничителя частоты запросов на Lua скрипте"""
+
+    script_source: str
+
+    def __init__(self) -> None:
+        self._script = None
+        self._script_client: Redis | None = None
+        self.redis_calls = 0
+        self.redis_errors = 0
+
+    def _get_script(self):
+        if self._script_client is not cache.redis:
+            self._script = cache.redis.register_script(self.script_source)
+            self._script_client = cache.redis
+
+        return self._script
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {"redis_calls": self.redis_calls, "redis_errors": self.redis_errors}
+
+
+class GCRARateLimiter(BaseRateLimiter):
+    """
+    Ограничение частоты запросов по алгоритму GCRA.
+    Проверка и учет запроса выполняются одним Lua скриптом за один запрос к Redis
+    """
+
+    script_source = GCRA_SCRIPT
+
+    def __init__(self, limit: int, period_seconds: int) -> None:
+        super().__init__()
+        self.limit = limit
+        self.emission_interval_ms = period_seconds * 1000 / limit
+
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Учет запроса с проверкой лимита"""
+
+        self.redis_calls += 1
+        allowed, remaining, retry_after_ms, reset_after_ms = await self._get_script()(
+            keys=[f"{RATE_LIMIT_KEY_PREFIX}:{key}"],
+            args=[self.emission_interval_ms, self.limit, cost],
+        )
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limit,
+            remaining=max(int(remaining), 0),
+            retry_after_ms=int(retry_after_ms),
+            reset_after_ms=int(reset_after_ms),
+        )
+
+
+class LocalBucket:
+    """Состояние лимита клиента в воркере между синхронизациями с Redis"""
+
+    __slots__ = ("tokens", "pending", "synced_at")
+
+    def __init__(self, tokens: float) -> None:
+        self.tokens = tokens
+        self.pending = 0
+        self.synced_at = time.monotonic()
+
+
+class HybridRateLimiter(BaseRateLimiter):
+    """
+    Двухуровневое ограничение частоты запросов.
+
+    Воркер пропускает запросы по локальной копии корзины токенов и раз
+    в sync_interval_ms одним конвейером отправляет в Redis число
+    пропущенных запросов по всем клиентам, получая в ответ глобальный
+    остаток. Между синхронизациями воркер пропускает по клиенту
+    не больше local_burst запросов, поэтому превышение глобального лимита
+    ограничено величиной (число воркеров * local_burst) за интервал
+    """
+
+    script_source = TOKEN_BUCKET_SYNC_SCRIPT
+
+    def __init__(
+        self,
+        limit: int,
+        period_seconds: int,
+        sync_interval_ms: int,
+        local_burst: int,
+    ) -> None:
+        super().__init__()
+        self.limit = limit
+        self.period_seconds = period_seconds
+        self.rate_per_ms = limit / (period_seconds * 1000)
+        self.sync_interval_ms = sync_interval_ms
+        self.local_burst = local_burst
+        self._buckets: dict[str, LocalBucket] = {}
+        self._task: asyncio.Task | None = None
+        self.local_decisions = 0
+        self.syncs = 0
+
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Учет запроса по локальной корзине без обращения к Redis"""
+
+        self.local_decisions += 1
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = LocalBucket(self.limit)
+
+        allowance = min(bucket.tokens, self.local_burst) - bucket.pending
+        if allowance < cost:
+            missing_tokens = max(cost - (bucket.tokens - bucket.pending), 0)
+            return RateLimitResult(
+                allowed=False,
+                limit=self.limit,
+                remaining=0,
+                retry_after_ms=max(
+                    math.ceil(missing_tokens / self.rate_per_ms), self.sync_interval_ms
+                ),
+                reset_after_ms=math.ceil(self.limit / self.rate_per_ms),
+            )
+
+        bucket.pending += cost
+        remaining = max(int(bucket.tokens - bucket.pending), 0)
+        return RateLimitResult(
+            allowed=True,
+            limit=self.limit,
+            remaining=remaining,
+            retry_after_ms=0,
+            reset_after_ms=math.ceil((self.limit - remaining) / self.rate_per_ms),
+        )
+
+    async def sync(self) -> None:
+        """Сверка локального расхода с Redis"""
+
+        now = time.monotonic()
+        keys = [
+            key
+            for key, bucket in self._buckets.items()
+            if bucket.pending or bucket.tokens < self.limit
+        ]
+        for key in set(self._buckets) - set(keys):
+            if now - self._buckets[key].synced_at > self.period_seconds:
+                del self._buckets[key]
+        if not keys:
+            return
+
+        script = self._get_script()
+        pipe = cache.redis.pipeline(transaction=False)
+        sent = {}
+        for key in keys:
+            sent[key] = self._buckets[key].pending
+            await script(
+                keys=[f"{RATE_LIMIT_KEY_PREFIX}:bucket:{key}"],
+                args=[self.rate_per_ms, self.limit, sent[key]],
+                client=pipe,
+            )
+        results = await pipe.execute()
+        self.redis_calls += 1
+        self.syncs += 1
+
+        synced_at = time.monotonic()
+        for key, tokens in zip(keys, results):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            # запросы, пропущенные во время синхронизации, уйдут в следующую
+            bucket.pending -= sent[key]
+            bucket.tokens = float(tokens)
+            bucket.synced_at = synced_at
+
+    async def _sync_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_ms / 1000)
+            try:
+                await self.sync()
+            except Exception as exc:
+                auth_logger.error(f"Ошибка синхронизации лимита запросов: {exc}")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._sync_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.sync()
+        except RedisError as exc:
+            auth_logger.error(f"Ошибка синхронизации лимита запросов: {exc}")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **super().stats(),
+            "local_decisions": self.local_decisions,
+            "syncs": self.syncs,
+            "tracked_clients": len(self._buckets),
+        }
+
+
+def get_rate_limit_key(request: Request) -> str:
+    """Идентификатор клиента для лимита запросов"""
+
+    user_agent = request.headers.get("user-agent")
+    if user_agent:
+        return user_agent
+
+    return get_client_ip(request) or "unknown"
+
+
+def make_rate_limiter() -> BaseRateLimiter:
+    if settings.rate_limit_backend == "hybrid":
+        return HybridRateLimiter(
+            settings.request_limit_per_minute,
+            settings.rate_limit_period_seconds,
+            settings.rate_limit_sync_interval_ms,
+            settings.rate_limit_local_burst,
+        )
+
+    return GCRARateLimiter(
+        settings.request_limit_per_minute, settings.rate_limit_period_seconds
+    )
+
+
+rate_limiter = make_rate_limiter()
+
+
+async def check_request_limit(request: Request) -> RateLimitResult | None:
+    """
+    Проверка лимита запросов клиента.
+    Как и блокировка входа, при недоступном Redis лимит не проверяется
+    и возвращается None
+    """
+
+    try:
+        return await rate_limiter.hit(get_rate_limit_key(request))
+    except RedisError as exc:
+        rate_limiter.redis_errors += 1
+        auth_logger.error(f"Ошибка при проверке лимита запросов: {exc}")
+        return None
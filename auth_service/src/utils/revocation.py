@@ -0,0 +1,160 @@
+import asyncio
+import math
+import time
+
+from src.core.config import settings
+from src.core.logger import auth_logger
+from src.db import cache
+from src.utils.bloom_filter import BloomFilter
+
+REVOKED_TOKEN_KEY_PREFIX = "revoked_token"
+REVOKED_TOKENS_CHANNEL = "revoked_tokens"
+
+
+class TokenRevocationList:
+    """
+    Список отозванных токенов.
+
+    Идентификаторы (jti) отозванных токенов хранятся в Redis с TTL,
+    равным оставшемуся сроку жизни токена. Каждый воркер держит у себя
+    фильтр Блума, который пополняется через Redis pub/sub, поэтому для
+    неотозванного токена запрос в Redis не нужен: точная проверка
+    выполняется только при срабатывании фильтра
+    """
+
+    def __init__(self) -> None:
+        self._bloom = self._make_bloom()
+        self._pending: set[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.bloom_negatives = 0
+        self.bloom_positives = 0
+        self.revoked_hits = 0
+
+    @staticmethod
+    def _make_bloom() -> BloomFilter:
+        return BloomFilter(
+            settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate
+        )
+
+    @staticmethod
+    def make_key(token_id: str) -> str:
+        return f"{REVOKED_TOKEN_KEY_PREFIX}:{token_id}"
+
+    def _remember(self, token_id: str) -> None:
+        self._bloom.add(token_id)
+        if self._pending is not None:
+            self._pending.add(token_id)
+
+    async def revoke(self, token_id: str, expires_at: int) -> None:
+        """Отзыв токена до окончания срока его жизни"""
+
+        await self.revoke_many([(token_id, expires_at)])
+
+    async def revoke_many(self, tokens: list[tuple[str, int]]) -> None:
+        """Отзыв нескольких токенов за один запрос к Redis"""
+
+        now = time.time()
+        tokens = [
+            (token_id, max(1, math.ceil(expires_at - now)))
+            for token_id, expires_at in tokens
+            if expires_at > now
+        ]
+        if not tokens:
+            return
+
+        pipe = cache.redis.pipeline(transaction=False)
+        for token_id, ttl in tokens:
+            pipe.set(self.make_key(token_id), 1, ex=ttl)
+            pipe.publish(REVOKED_TOKENS_CHANNEL, token_id)
+        await pipe.execute()
+
+        for token_id, _ in tokens:
+            self._remember(token_id)
+
+    async def is_revoked(self, token_id: str) -> bool:
+        """Проверка, отозван ли токен"""
+
+        if token_id not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+
+        self.bloom_positives += 1
+        try:
+            revoked = bool(await cache.redis.exists(self.make_key(token_id)))
+        except Exception as exc:
+            auth_logger.error(f"Ошибка при проверке отзыва токена {token_id}: {exc}")
+            return True
+
+        self.revoked_hits += revoked
+        return revoked
+
+    async def rebuild(self) -> None:
+        """
+        Пересборка фильтра по ключам из Redis,
+        чтобы из него пропали токены с истекшим сроком жизни
+        """
+
+        self._pending = set()
+        bloom = self._make_bloom()
+        try:
+            async for key in cache.redis.scan_iter(
+                match=f"{REVOKED_TOKEN_KEY_PREFIX}:*", count=1000
+            ):
+                bloom.add(key.split(":", 1)[1])
+
+            for token_id in self._pending:
+                bloom.add(token_id)
+            self._bloom = bloom
+        finally:
+            self._pending = None
+
+    async def _listen(self) -> None:
+        """Получение отозванных токенов от других воркеров"""
+
+        while True:
+            pubsub = cache.redis.pubsub()
+            try:
+                await pubsub.subscribe(REVOKED_TOKENS_CHANNEL)
+                # сообщения, пропущенные до подписки, подтягиваются из Redis
+                await self.rebuild()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._remember(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                auth_logger.error(f"Ошибка подписки на отозванные токены: {exc}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def _rebuild_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.revocation_bloom_rebuild_seconds)
+            try:
+                await self.rebuild()
+            except Exception as exc:
+                auth_logger.error(f"Ошибка пересборки фильтра отозванных токенов: {exc}")
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._rebuild_periodically()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "bloom_items": self._bloom.count,
+            "bloom_negatives": self.bloom_negatives,
+            "bloom_positives": self.bloom_positives,
+            "revoked_hits": self.revoked_hits,
+        }
+
+
+revocation_list = TokenRevocationList()
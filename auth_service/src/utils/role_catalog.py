@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+from uuid import UUID
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.logger import auth_logger
+from src.db import cache
+from src.db.models import Role
+from src.schemas.role import RoleGeneral
+
+ROLES_INVALIDATED_CHANNEL = "roles_invalidated"
+
+
+class RoleCatalog:
+    """
+    Каталог ролей в памяти воркера.
+
+    Роли - маленькая и редко меняющаяся таблица, поэтому каждый воркер
+    загружает ее целиком при старте и отвечает на запросы ролей без БД.
+    Изменение ролей в любом воркере рассылается через Redis pub/sub,
+    получив сообщение, воркер перечитывает таблицу при следующем запросе
+    """
+
+    def __init__(self) -> None:
+        self._roles: list[RoleGeneral] = []
+        self._names_by_id: dict[UUID, str] = {}
+        self._ids_by_name: dict[str, UUID] = {}
+        self.etag = ""
+        self._loaded = False
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.loads = 0
+        self.invalidations = 0
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузка всех ролей из БД"""
+
+        generation = self._generation
+        roles = [
+            RoleGeneral.model_validate(role, from_attributes=True)
+            for role in await db.scalars(select(Role))
+        ]
+
+        self._roles = roles
+        self._names_by_id = {role.id: role.name for role in roles}
+        self._ids_by_name = {}
+        for role in roles:
+            self._ids_by_name.setdefault(role.name, role.id)
+        self.etag = '"{}"'.format(
+            hashlib.sha256(
+                orjson.dumps([role.model_dump(mode="json") for role in roles])
+            ).hexdigest()[:32]
+        )
+        # инвалидация во время загрузки оставляет каталог устаревшим
+        self._loaded = generation == self._generation
+        self.loads += 1
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self._loaded:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+
+    async def get_roles(self, db: AsyncSession) -> list[RoleGeneral]:
+        await self.ensure_loaded(db)
+
+        return self._roles
+
+    async def get_name(self, db: AsyncSession, role_id: UUID) -> str | None:
+        await self.ensure_loaded(db)
+
+        return self._names_by_id.get(role_id)
+
+    async def get_id(self, db: AsyncSession, name: str) -> UUID | None:
+        await self.ensure_loaded(db)
+
+        return self._ids_by_name.get(name)
+
+    def invalidate_local(self) -> None:
+        self._loaded = False
+        self._generation += 1
+        self.invalidations += 1
+
+    async def invalidate(self) -> None:
+        """Сброс каталога во всех воркерах"""
+
+        self.invalidate_local()
+        try:
+            await cache.redis.publish(ROLES_INVALIDATED_CHANNEL, 1)
+        except Exception as exc:
+            auth_logger.error(f"Ошибка при рассылке изменения ролей: {exc}")
+
+    async def _listen(self) -> None:
+        """Получение изменений ролей от других воркеров"""
+
+        reconnecting = False
+        while True:
+            pubsub = cache.redis.pubsub()
+            try:
+                await pubsub.subscribe(ROLES_INVALIDATED_CHANNEL)
+                # изменения, пропущенные во время переподключения, не должны потеряться
+                if reconnecting:
+                    self.invalidate_local()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate_local()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                auth_logger.error(f"Ошибка подписки на изменения ролей: {exc}")
+                reconnecting = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._roles),
+            "loaded": self._loaded,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+        }
+
+
+role_catalog = RoleCatalog()
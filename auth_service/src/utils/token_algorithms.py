@@ -0,0 +1,96 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+
+class TokenAlgorithm(ABC):
+    """Ключи одного алгоритма подписи JWT"""
+
+    name: str
+    private_key_types: tuple[type, ...]
+    public_key_types: tuple[type, ...]
+
+    @abstractmethod
+    def generate_private_key(self) -> Any:
+        pass
+
+    def load_private_key(self, pem: str) -> Any:
+        """Приватный ключ из PEM с проверкой, что он подходит алгоритму"""
+
+        key = serialization.load_pem_private_key(pem.encode(), password=None)
+        if not isinstance(key, self.private_key_types):
+            raise ValueError(f"Приватный ключ не подходит для алгоритма '{self.name}'")
+
+        return key
+
+    def load_public_key(self, pem: str) -> Any:
+        """Публичный ключ из PEM с проверкой, что он подходит алгоритму"""
+
+        key = serialization.load_pem_public_key(pem.encode())
+        if not isinstance(key, self.public_key_types):
+            raise ValueError(f"Публичный ключ не подходит для алгоритма '{self.name}'")
+
+        return key
+
+    def fits_public_key(self, key: Any) -> bool:
+        return isinstance(key, self.public_key_types)
+
+
+class RS256Algorithm(TokenAlgorithm):
+    name = "RS256"
+    private_key_types = (rsa.RSAPrivateKey,)
+    public_key_types = (rsa.RSAPublicKey,)
+
+    def generate_private_key(self) -> rsa.RSAPrivateKey:
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+class ES256Algorithm(TokenAlgorithm):
+    name = "ES256"
+    private_key_types = (ec.EllipticCurvePrivateKey,)
+    public_key_types = (ec.EllipticCurvePublicKey,)
+
+    def generate_private_key(self) -> ec.EllipticCurvePrivateKey:
+        return ec.generate_private_key(ec.SECP256R1())
+
+    def fits_public_key(self, key: Any) -> bool:
+        return super().fits_public_key(key) and isinstance(key.curve, ec.SECP256R1)
+
+
+class EdDSAAlgorithm(TokenAlgorithm):
+    name = "EdDSA"
+    private_key_types = (ed25519.Ed25519PrivateKey,)
+    public_key_types = (ed25519.Ed25519PublicKey,)
+
+    def generate_private_key(self) -> ed25519.Ed25519PrivateKey:
+        return ed25519.Ed25519PrivateKey.generate()
+
+
+TOKEN_ALGORITHMS: dict[str, TokenAlgorithm] = {
+    algorithm.name: algorithm
+    for algorithm in (RS256Algorithm(), ES256Algorithm(), EdDSAAlgorithm())
+}
+
+
+def get_token_algorithm(name: str) -> TokenAlgorithm:
+    """Алгоритм по значению 'alg' в заголовке JWT"""
+
+    try:
+        return TOKEN_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(
+            f"Алгоритм токенов '{name}' не поддерживается, "
+            f"допустимые значения: {', '.join(TOKEN_ALGORITHMS)}"
+        )
+
+
+def token_algorithm_for_public_key(key: Any) -> TokenAlgorithm:
+    """Алгоритм по типу публичного ключа"""
+
+    for algorithm in TOKEN_ALGORITHMS.values():
+        if algorithm.fits_public_key(key):
+            return algorithm
+
+    raise ValueError(f"Нет алгоритма токенов для ключа типа '{type(key).__name__}'")
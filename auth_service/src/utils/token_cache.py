@@ -0,0 +1,52 @@
+import hashlib
+import time
+from typing import Any
+
+from src.core.config import settings
+from src.utils.lru import LRUCache
+
+
+class VerifiedTokenCache(LRUCache[bytes, tuple[dict[str, Any], float]]):
+    """
+    LRU кэш уже проверенных claims токенов в памяти воркера.
+
+    Ключ записи - SHA-256 токена, сами токены в памяти не хранятся.
+    Запись удаляется по 'exp' токена или при переполнении кэша
+    """
+
+    @staticmethod
+    def make_key(token: str) -> bytes:
+        """Ключ кэша для токена"""
+
+        return hashlib.sha256(token.encode()).digest()
+
+    def is_fresh(self, value: tuple[dict[str, Any], float]) -> bool:
+        _, exp = value
+        return exp > time.time()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        """Проверенные claims токена, если он есть в кэше и не истек"""
+
+        entry = super().get(self.make_key(token))
+        if entry is None:
+            return None
+
+        claims, _ = entry
+        return dict(claims)
+
+    def set(self, token: str, claims: dict[str, Any]) -> None:
+        """Сохранение проверенных claims в кэш"""
+
+        exp = claims.get("exp")
+        if exp is None:
+            return
+
+        super().set(self.make_key(token), (dict(claims), float(exp)))
+
+    def invalidate(self, token: str) -> None:
+        """Удаление токена из кэша"""
+
+        self.pop(self.make_key(token))
+
+
+verified_token_cache = VerifiedTokenCache(settings.token_cache_max_size)
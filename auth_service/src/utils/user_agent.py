@@ -0,0 +1,84 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+from src.core.config import settings
+from src.utils.lru import LRUCache
+
+# порядок важен: строки браузеров на Chromium содержат и Chrome, и Safari
+BROWSER_PATTERNS = (
+    ("Edge", re.compile(r"Edg(e|A|iOS)?/")),
+    ("Opera", re.compile(r"OPR/|Opera")),
+    ("Yandex", re.compile(r"YaBrowser/")),
+    ("Firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("Chrome", re.compile(r"Chrome/|CriOS/")),
+    ("Safari", re.compile(r"Version/[\d.]+.*Safari/")),
+    ("Internet Explorer", re.compile(r"MSIE |Trident/")),
+    ("curl", re.compile(r"^curl/")),
+    ("python", re.compile(r"python|aiohttp", re.IGNORECASE)),
+)
+OS_PATTERNS = (
+    ("Windows", re.compile(r"Windows")),
+    ("Android", re.compile(r"Android")),
+    ("iOS", re.compile(r"iPhone|iPad|iPod")),
+    ("macOS", re.compile(r"Mac OS X|Macintosh")),
+    ("ChromeOS", re.compile(r"CrOS")),
+    ("Linux", re.compile(r"Linux|X11")),
+)
+BOT_PATTERN = re.compile(r"bot|crawl|spider|slurp", re.IGNORECASE)
+TABLET_PATTERN = re.compile(r"iPad|Tablet|Android(?!.*Mobile)")
+MOBILE_PATTERN = re.compile(r"Mobi|iPhone|iPod|Android")
+DESKTOP_OS = {"Windows", "macOS", "ChromeOS", "Linux"}
+
+
+@dataclass(frozen=True)
+class ParsedUserAgent:
+    """Браузер, ОС и тип устройства, определенные по строке User-Agent"""
+
+    browser: str | None
+    os: str | None
+    device: str
+
+
+def match_first(patterns: tuple, user_agent: str) -> str | None:
+    return next(
+        (name for name, pattern in patterns if pattern.search(user_agent)), None
+    )
+
+
+def parse_user_agent(user_agent: str) -> ParsedUserAgent:
+    """Разбор строки User-Agent по регулярным выражениям"""
+
+    browser = match_first(BROWSER_PATTERNS, user_agent)
+    os = match_first(OS_PATTERNS, user_agent)
+    if BOT_PATTERN.search(user_agent):
+        device = "bot"
+    elif TABLET_PATTERN.search(user_agent):
+        device = "tablet"
+    elif MOBILE_PATTERN.search(user_agent):
+        device = "mobile"
+    elif os in DESKTOP_OS:
+        device = "desktop"
+    else:
+        device = "other"
+
+    return ParsedUserAgent(browser, os, device)
+
+
+def user_agent_hash(user_agent: str) -> str:
+    """Ключ строки User-Agent в справочнике user_agents"""
+
+    return hashlib.sha256(user_agent.encode()).hexdigest()
+
+
+class UserAgentCache(LRUCache[str, int]):
+    """
+    LRU-кэш идентификаторов справочника user_agents в памяти воркера.
+
+    Различных строк User-Agent немного, поэтому почти каждая запись
+    истории находит идентификатор в кэше и не обращается к справочнику.
+    Ключ - хеш строки, как и в справочнике
+    """
+
+
+user_agent_cache = UserAgentCache(settings.user_agent_cache_max_size)